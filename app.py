@@ -1,9 +1,21 @@
+import functools
+import hmac
 import os
-from flask import Flask, render_template, request, send_file, redirect, url_for, flash
-from io import BytesIO
+from flask import Flask, Response, abort, render_template, request, redirect, url_for, flash, jsonify
 import pdfkit
 import tempfile
 import json
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from render_pool import PoolBusy, pool_from_env
+from http_compress import compressor_from_env
+from llm_scheduler import scheduler_from_env
+from pdf_response import remove_quietly, send_pdf_file, temporary_pdf_path
+from llm_stream import iter_with_deadline, sse
+from resilience import CircuitBreaker, CircuitOpen, local_cleanup
+from singleflight import SingleFlight
 
 # Optional OpenAI usage
 try:
@@ -11,9 +23,16 @@ try:
 except Exception:
     openai = None
 
+try:
+    import resume_pdf
+except Exception:
+    resume_pdf = None
+
 # Config
 app = Flask(__name__)
 app.secret_key = os.environ.get("FLASK_SECRET", "dev-secret-change-this")
+# gzip/brotli for HTML and JSON responses (COMPRESS_* variables, see http_compress.py)
+compressor = compressor_from_env(app)
 
 from markupsafe import Markup
 @app.template_filter('nl2br')
@@ -26,6 +45,53 @@ OPENAI_KEY = os.environ.get("OPENAI_API_KEY", None)
 OPENAI_MODEL = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")  # optional; change if needed
 if openai and OPENAI_KEY:
     openai.api_key = OPENAI_KEY
+# seconds an enhancement may take before we fall back to local cleanup
+AI_LATENCY_BUDGET = float(os.environ.get("AI_LATENCY_BUDGET", "15"))
+AI_BREAKER_FAILURES = int(os.environ.get("AI_BREAKER_FAILURES", "5"))
+AI_BREAKER_RESET = float(os.environ.get("AI_BREAKER_RESET", "30"))
+# show the preview at once and stream each section's rewrite into it (/enhance/stream) instead
+# of waiting for every section. Off by default: streamed calls bypass llm_scheduler's batching
+AI_STREAMING = os.environ.get("AI_STREAMING", "0") == "1"
+
+# Identical prompts that arrive together share one OpenAI call
+llm_flights = SingleFlight()
+
+def _openai_complete(prompt, system=None, size=1, timeout=None):
+    # Using ChatCompletion-like interface -- adapt if your openai package differs
+    response = openai.ChatCompletion.create(
+        model=OPENAI_MODEL,
+        messages=[
+            {"role": "system", "content": system},
+            {"role": "user", "content": prompt}
+        ],
+        max_tokens=min(400 * size, 4000),
+        temperature=0.2,
+        # the HTTP timeout: without it a hung call holds a scheduler thread after the caller gave up
+        request_timeout=max(1.0, timeout) if timeout is not None else None,
+    )
+    # adapt parsing based on response structure
+    return response["choices"][0]["message"]["content"]
+
+def _openai_stream(prompt, system=None, timeout=None):
+    response = openai.ChatCompletion.create(
+        model=OPENAI_MODEL,
+        messages=[
+            {"role": "system", "content": system},
+            {"role": "user", "content": prompt}
+        ],
+        max_tokens=400,
+        temperature=0.2,
+        stream=True,
+        request_timeout=max(1.0, timeout) if timeout is not None else None,
+    )
+    for chunk in response:
+        yield chunk["choices"][0].get("delta", {}).get("content") or ""
+
+# Batches concurrent prompts and keeps OpenAI calls within LLM_RPM / LLM_TPM
+llm_scheduler = scheduler_from_env(_openai_complete)
+# Stops calling OpenAI after repeated failures, probing again after AI_BREAKER_RESET seconds
+llm_breaker = CircuitBreaker(failure_threshold=AI_BREAKER_FAILURES, reset_timeout=AI_BREAKER_RESET)
+ai_stats = {"timeouts": 0, "errors": 0, "fallbacks": 0}
 
 # pdfkit/wkhtmltopdf config:
 # If wkhtmltopdf is not in PATH, set path here or set wkhtmltopdf in system PATH
@@ -36,38 +102,77 @@ else:
     # lets pdfkit try to find wkhtmltopdf in PATH
     config = None
 
-def ai_enhance_text(prompt_text: str, role_hint="You are an expert resume writer.") -> str:
+# "wkhtmltopdf" renders resume.html, "reportlab" builds the PDF in-process (resume_pdf.py)
+PDF_BACKEND = os.environ.get("PDF_BACKEND", "wkhtmltopdf")
+
+# Caps concurrent wkhtmltopdf processes across all requests (see render_pool.py)
+renderer = pool_from_env(WKHTMLTOPDF_PATH)
+
+# /metrics is off unless this is set, and then needs it as a bearer token
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+def ai_enhance_text(prompt_text: str, role_hint="You are an expert resume writer.", fallback_text=None) -> str:
     """
-    Enhance text using OpenAI if available. If OpenAI not configured, do a small local fallback.
+    Enhance text using OpenAI if available. If OpenAI is not configured, fails, or takes longer than
+    AI_LATENCY_BUDGET, return a small local cleanup of fallback_text (the raw section text) instead.
     """
     if openai and OPENAI_KEY:
+        deadline = time.monotonic() + AI_LATENCY_BUDGET
+
+        def call():
+            remaining = max(0.0, deadline - time.monotonic())
+            return llm_breaker.call(llm_scheduler.complete, prompt_text, role_hint, timeout=remaining).strip()
+
+        key = hashlib.sha256("\0".join((OPENAI_MODEL, role_hint, prompt_text)).encode("utf-8")).hexdigest()
         try:
-            # Using ChatCompletion-like interface -- adapt if your openai package differs
-            response = openai.ChatCompletion.create(
-                model=OPENAI_MODEL,
-                messages=[
-                    {"role": "system", "content": role_hint},
-                    {"role": "user", "content": prompt_text}
-                ],
-                max_tokens=400,
-                temperature=0.2,
-            )
-            # adapt parsing based on response structure
-            content = response["choices"][0]["message"]["content"].strip()
-            return content
+            return llm_flights.do(key, call, timeout=AI_LATENCY_BUDGET)
+        except TimeoutError:
+            ai_stats["timeouts"] += 1
+            print(f"OpenAI call exceeded {AI_LATENCY_BUDGET}s budget, using local cleanup")
+        except CircuitOpen:
+            pass
         except Exception as e:
             # don't fail the whole request; fallback to simple cleaning
+            ai_stats["errors"] += 1
             print("OpenAI call failed:", e)
-            pass
+        ai_stats["fallbacks"] += 1
 
     # Local fallback: basic cleanup + sentence improvements (simple heuristics)
-    s = " ".join(prompt_text.split())  # collapse whitespace
-    # Ensure sentences end with periods
-    if not s.endswith((".", "?", "!")):
-        s += "."
-    # Capitalize first letter
-    s = s[0].upper() + s[1:]
-    return s
+    return local_cleanup(prompt_text if fallback_text is None else fallback_text)
+
+# Sections rewritten when "enhance_ai" is on: section -> (prompt prefix, role hint).
+# Each one becomes an independent LLM call, so adding a section here doesn't add latency.
+ENHANCE_SECTIONS = {
+    "summary": (
+        "Rewrite the following professional summary to be clearer, concise, and resume-ready:\n\n",
+        "You are a helpful professional resume writer. Give a polished single-paragraph summary.",
+    ),
+    # Ask AI to convert the experience block (user can paste multiple jobs) into bullet points
+    "experience": (
+        "Convert the following experience entries into 4-6 concise resume bullet points per job. "
+        "Keep numbers where possible and use action verbs. Input:\n\n",
+        "You are an expert resume bullet point writer.",
+    ),
+}
+section_pool = ThreadPoolExecutor(max_workers=int(os.environ.get("AI_SECTION_WORKERS", "8")),
+                                  thread_name_prefix="ai-section")
+
+def enhance_sections(data):
+    """Fill data["<section>_enhanced"] for every ENHANCE_SECTIONS entry, running the LLM calls in parallel"""
+    futures = {}
+    for section, (prefix, role_hint) in ENHANCE_SECTIONS.items():
+        if data.get(section):
+            futures[section] = section_pool.submit(ai_enhance_text, prefix + data[section],
+                                                   role_hint=role_hint, fallback_text=data[section])
+        else:
+            data[f"{section}_enhanced"] = ""
+    for section, future in futures.items():
+        try:
+            data[f"{section}_enhanced"] = future.result()
+        except Exception as e:
+            # one section failing shouldn't cost the others their AI result
+            print(f"Enhancing {section} failed:", e)
+            data[f"{section}_enhanced"] = local_cleanup(data[section])
 
 @app.route("/", methods=["GET", "POST"])
 def form():
@@ -87,25 +192,15 @@ def form():
         # If user asked for AI enhancement checkbox is on
         enhance = request.form.get("enhance_ai", "off") == "on"
 
-        # Enhance summary and experience if requested
+        # Enhance summary and experience (each section concurrently) if requested
+        if enhance and AI_STREAMING and openai and OPENAI_KEY:
+            # the page fills these in from /enhance/stream; until then it shows the raw text
+            data["summary_enhanced"] = data["summary"]
+            data["experience_enhanced"] = data["experience"]
+            stream_sections = [s for s in ENHANCE_SECTIONS if data.get(s)]
+            return render_template("resume.html", data=data, stream_sections=stream_sections)
         if enhance:
-            # Enhance professional summary
-            if data["summary"]:
-                prompt = f"Rewrite the following professional summary to be clearer, concise, and resume-ready:\n\n{data['summary']}"
-                data["summary_enhanced"] = ai_enhance_text(prompt, role_hint="You are a helpful professional resume writer. Give a polished single-paragraph summary.")
-            else:
-                data["summary_enhanced"] = ""
-
-            # Enhance experience -> convert lines into strong bullet points
-            if data["experience"]:
-                # Ask AI to convert the experience block (user can paste multiple jobs) into bullet points
-                prompt = (
-                    "Convert the following experience entries into 4-6 concise resume bullet points per job. "
-                    "Keep numbers where possible and use action verbs. Input:\n\n" + data["experience"]
-                )
-                data["experience_enhanced"] = ai_enhance_text(prompt, role_hint="You are an expert resume bullet point writer.")
-            else:
-                data["experience_enhanced"] = ""
+            enhance_sections(data)
         else:
             # No AI: keep original text; also create simple bullets from experience by splitting lines
             data["summary_enhanced"] = data["summary"]
@@ -160,14 +255,100 @@ def download_pdf():
             "margin-left": "12mm",
             "margin-right": "12mm",
         }
-        pdf_bytes = pdfkit.from_string(rendered, False, options=options, configuration=config)
-        return send_file(BytesIO(pdf_bytes), mimetype="application/pdf", as_attachment=True, download_name=f"{data.get('full_name','resume')}.pdf")
+        # render into a temp file and stream it, so a large PDF never sits in this process's memory
+        pdf_path = temporary_pdf_path()
+        try:
+            if request.form.get("backend", PDF_BACKEND) == "reportlab" and resume_pdf:
+                resume_pdf.create_pdf(resume_pdf.from_web_data(data), pdf_path)
+            else:
+                renderer.render(rendered, options, output_path=pdf_path)
+        except Exception:
+            remove_quietly(pdf_path)
+            raise
+        return send_pdf_file(pdf_path, f"{data.get('full_name','resume')}.pdf", temporary=True)
+    except PoolBusy:
+        flash("The PDF renderer is busy, please try again in a moment.")
+        return rendered, 503
     except Exception as e:
         print("PDF generation failed:", e)
         # Fallback: return HTML so user can use browser Print->Save as PDF
         flash("Server couldn't generate PDF automatically. Use browser Print -> Save as PDF (or install wkhtmltopdf).")
         return rendered
 
+@app.route("/enhance/stream", methods=["GET", "POST"])
+def enhance_stream():
+    """
+    Server-Sent Events version of the section enhancement: "delta" events carry text as OpenAI
+    generates it, the final "done" event carries the complete text (or the local cleanup fallback).
+    """
+    section = request.values.get("section", "summary")
+    text = request.values.get("text", "").strip()
+    if section not in ENHANCE_SECTIONS:
+        return jsonify({"error": f"unknown section {section!r}"}), 400
+    prefix, role_hint = ENHANCE_SECTIONS[section]
+    prompt = prefix + text
+
+    def events():
+        if text and openai and OPENAI_KEY and llm_breaker.allow():
+            parts = []
+            settled = False
+            try:
+                llm_scheduler.reserve(prompt, role_hint)
+                deadline = time.monotonic() + AI_LATENCY_BUDGET
+                for delta in iter_with_deadline(lambda: _openai_stream(prompt, role_hint, AI_LATENCY_BUDGET), deadline):
+                    if delta:
+                        parts.append(delta)
+                        yield sse("delta", {"text": delta})
+                settled = True
+                llm_breaker.record_success()
+                yield sse("done", {"text": "".join(parts).strip()})
+                return
+            except TimeoutError:
+                settled = True
+                llm_breaker.record_failure()
+                ai_stats["timeouts"] += 1
+            except Exception as e:
+                settled = True
+                llm_breaker.record_failure()
+                ai_stats["errors"] += 1
+                print("OpenAI stream failed:", e)
+            finally:
+                # client disconnected mid-stream (GeneratorExit): no verdict on the provider,
+                # but a half-open probe must not stay claimed forever
+                if not settled:
+                    llm_breaker.release()
+            ai_stats["fallbacks"] += 1
+        yield sse("done", {"text": local_cleanup(text), "fallback": True})
+
+    return Response(events(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def admin_only(view):
+    """404 unless ADMIN_TOKEN is configured, 403 unless the request sends `Authorization: Bearer <ADMIN_TOKEN>`"""
+    @functools.wraps(view)
+    def guarded(*args, **kwargs):
+        if not ADMIN_TOKEN:
+            abort(404)
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(token.strip().encode(), ADMIN_TOKEN.encode()):
+            return jsonify({"error": "admin token required"}), 403
+        return view(*args, **kwargs)
+    return guarded
+
+@app.route("/metrics", methods=["GET"])
+@admin_only
+def metrics():
+    return jsonify({
+        "renderer": renderer.stats(),
+        "compression": compressor.stats(),
+        "llm": {
+            **ai_stats,
+            "breaker": llm_breaker.stats(),
+            "single_flight": llm_flights.stats(),
+            "scheduler": llm_scheduler.stats(),
+        },
+    })
+
 if __name__ == "__main__":
     # debug=True for development only
     app.run(host="0.0.0.0", port=5000, debug=True)
@@ -1,20 +1,52 @@
+import functools
+import hashlib
+import hmac
+import importlib.util
+import itertools
 import os
 import re
-from flask import Flask, render_template, request, redirect, url_for, send_file, flash
+import threading
+import time
+import click
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from flask import Flask, Response, abort, render_template, request, redirect, url_for, send_file, flash, jsonify, session, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
+from jinja2 import ChoiceLoader, DictLoader, FileSystemBytecodeCache, FileSystemLoader
+from sqlalchemy import event, inspect, select, text, update
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import load_only
 from markupsafe import Markup
+from werkzeug.http import is_resource_modified
+from werkzeug.utils import secure_filename
 from io import BytesIO
 
+from bulk_export import export_entries, stream_zip
+from bytes_lru import BytesLRU
+from enhancement_cache import EnhancementCache
+from http_compress import compressor_from_env
+from llm_scheduler import scheduler_from_env
+from llm_stream import StreamHub, iter_with_deadline, sse
+from pdf_cache import PDFCache, cache_key
+from resilience import CircuitBreaker, CircuitOpen
+from singleflight import SingleFlight
+from sqlite_tuning import engine_options_from_env, install_pragmas, pragmas_from_env, read_pragmas
+from pdf_jobs import QueueFull, queue_from_env
+from pdf_response import remove_quietly, send_pdf_file, temporary_pdf_path
+from render_pool import PoolBusy, pool_from_env
+import resume_search
+import skill_index
+import text_compression
+from text_compression import CompressedText
+
 # import extra files
 try:
     import pdfkit
 except Exception:
     pdfkit = None
 
-try:
-    from llama_index.llms.gemini import Gemini
-except Exception:
-    Gemini = None
+# llama_index and reportlab are slow to import; they're loaded on first use (get_llm / get_resume_pdf)
+resume_pdf = None
 
 # 9541502580
 
@@ -23,25 +55,97 @@ BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
 STATIC_DIR = os.path.join(BASE_DIR, "static")
 CSS_FILE = os.path.join(STATIC_DIR, "style.css")
-DB_FILE = os.path.join(BASE_DIR, "resumes.db")
+DB_FILE = os.environ.get("DB_FILE", os.path.join(BASE_DIR, "resumes.db"))
+# WAL, busy timeout, mmap/cache sizes etc. (see sqlite_tuning.py for the SQLITE_* variables)
+SQLITE_PRAGMAS = pragmas_from_env()
+JINJA_CACHE_DIR = os.environ.get("JINJA_CACHE_DIR", os.path.join(BASE_DIR, "jinja_cache"))
+PDF_CACHE_DIR = os.environ.get("PDF_CACHE_DIR", os.path.join(BASE_DIR, "pdf_cache"))
+PDF_CACHE_MEMORY_ITEMS = int(os.environ.get("PDF_CACHE_MEMORY_ITEMS", "32"))
+PDF_CACHE_DISK_MB = int(os.environ.get("PDF_CACHE_DISK_MB", "512"))
+# rendered preview pages kept in memory, keyed by resume id + version
+PREVIEW_CACHE_ITEMS = int(os.environ.get("PREVIEW_CACHE_ITEMS", "512"))
+# how long an Idempotency-Key keeps pointing at the resume it created
+IDEMPOTENCY_TTL_HOURS = float(os.environ.get("IDEMPOTENCY_TTL_HOURS", "24"))
+# expired keys are deleted every this many new resumes (per process), or by `flask prune-idempotency-keys`
+IDEMPOTENCY_PRUNE_EVERY = int(os.environ.get("IDEMPOTENCY_PRUNE_EVERY", "200"))
+LIST_MAX_LIMIT = int(os.environ.get("LIST_MAX_LIMIT", "200"))
+SEARCH_MAX_PER_PAGE = int(os.environ.get("SEARCH_MAX_PER_PAGE", "100"))
+# "sync" renders inside the request, "async" queues a job and returns its id
+PDF_MODE = os.environ.get("PDF_MODE", "sync")
+# "wkhtmltopdf" renders the HTML templates, "reportlab" builds the PDF in-process (resume_pdf.py)
+PDF_BACKEND = os.environ.get("PDF_BACKEND", "wkhtmltopdf")
+EXPORT_MAX_RESUMES = int(os.environ.get("EXPORT_MAX_RESUMES", "1000"))
+# /export, /api/resumes and /metrics (see admin_only) are off unless this is set,
+# and then need it as a bearer token
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
 
 WKHTMLTOPDF_PATH = os.environ.get("WKHTMLTOPDF_PATH", None)
 WKHTMLTOPDF_PATH = r"C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe"
 
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
+GEMINI_MODEL = "gemini-flash-latest"
+# bump when the enhancement prompt changes so cached results from the old prompt aren't reused
+SUMMARY_PROMPT_VERSION = "summary-v1"
+ENHANCEMENT_CACHE_FILE = os.environ.get("ENHANCEMENT_CACHE_FILE", os.path.join(BASE_DIR, "enhancements.db"))
+ENHANCEMENT_CACHE_TTL_DAYS = float(os.environ.get("ENHANCEMENT_CACHE_TTL_DAYS", "30"))
+ENHANCEMENT_CACHE_MAX_ENTRIES = int(os.environ.get("ENHANCEMENT_CACHE_MAX_ENTRIES", "20000"))
+AI_WORKERS = int(os.environ.get("AI_WORKERS", "4"))
+# seconds an enhancement may take before we fall back to local cleanup
+AI_LATENCY_BUDGET = float(os.environ.get("AI_LATENCY_BUDGET", "15"))
+AI_BREAKER_FAILURES = int(os.environ.get("AI_BREAKER_FAILURES", "5"))
+AI_BREAKER_RESET = float(os.environ.get("AI_BREAKER_RESET", "30"))
+# stream Gemini tokens to the preview page (SSE) instead of waiting for the full completion.
+# Off by default: a streamed call is one request per resume, so it bypasses llm_scheduler's
+# batching; with it off, the SSE endpoint still sends the finished text in its "done" event.
+AI_STREAMING = os.environ.get("AI_STREAMING", "0") == "1"
 
-os.makedirs(TEMPLATES_DIR, exist_ok=True)
-os.makedirs(STATIC_DIR, exist_ok=True)
-
-# Initialize Gemini LLM
+# Gemini LLM, built by get_llm() the first time an enhancement needs it
 llm = None
-if GEMINI_API_KEY and Gemini:
+_llm_loaded = False
+_lazy_lock = threading.Lock()
+
+
+def get_llm():
+    global llm, _llm_loaded
+    if llm is not None or _llm_loaded:
+        return llm
+    with _lazy_lock:
+        if not _llm_loaded:
+            _llm_loaded = True
+            if GEMINI_API_KEY:
+                try:
+                    from llama_index.llms.gemini import Gemini
+                    llm = Gemini(api_key=GEMINI_API_KEY, model=GEMINI_MODEL)
+                    print("✓ Gemini LLM initialized successfully")
+                except Exception as e:
+                    print("Failed to init Gemini LLM:", e)
+                    llm = None
+    return llm
+
+
+def ai_available():
+    """Whether enhancements can run, without paying for the llama_index import"""
+    if llm is not None:
+        return True
+    if not GEMINI_API_KEY or _llm_loaded:
+        return False
     try:
-        llm = Gemini(api_key=GEMINI_API_KEY, model="gemini-flash-latest")
-        print("✓ Gemini LLM initialized successfully")
-    except Exception as e:
-        print("Failed to init Gemini LLM:", e)
-        llm = None
+        return importlib.util.find_spec("llama_index.llms.gemini") is not None
+    except Exception:
+        return False
+
+
+def get_resume_pdf():
+    global resume_pdf
+    if resume_pdf is None:
+        with _lazy_lock:
+            if resume_pdf is None:
+                try:
+                    import resume_pdf as module
+                    resume_pdf = module
+                except Exception:
+                    return None
+    return resume_pdf
 
 # CSS 
 CSS_CONTENT = """
@@ -83,21 +187,6 @@ textarea { min-height:100px; resize:vertical; }
 @media (max-width:800px){ .row { flex-direction:column; } .container { padding:12px; } }
 """
 
-# Write CSS file if missing / different
-write_css = True
-if os.path.exists(CSS_FILE):
-    try:
-        with open(CSS_FILE, "r", encoding="utf-8") as f:
-            existing = f.read()
-        if existing.strip() == CSS_CONTENT.strip():
-            write_css = False
-    except Exception:
-        write_css = True
-
-if write_css:
-    with open(CSS_FILE, "w", encoding="utf-8") as f:
-        f.write(CSS_CONTENT)
-
 # base.html
 BASE_HTML = """<!doctype html>
 <html>
@@ -201,6 +290,31 @@ PREVIEW_HTML = """{% extends "base.html" %}
 {% block content %}
 <div class="preview-card">
   <h2>Preview — {{ data.full_name }}</h2>
+  {% if data.enhancement_status in ('pending', 'running') %}
+    <p class="info" id="enhancement-note">✨ AI is polishing your summary, it will appear here in a moment.</p>
+    <p id="enhancement-live"></p>
+    <script>
+      function poll() {
+        fetch("{{ url_for('enhancement_status', resume_id=data.id) }}")
+          .then(function (r) { return r.json(); })
+          .then(function (s) { if (s.status === 'pending' || s.status === 'running') { setTimeout(poll, 2000); } else { location.reload(); } })
+          .catch(function () { setTimeout(poll, 5000); });
+      }
+      if (window.EventSource) {
+        var live = document.getElementById('enhancement-live');
+        var es = new EventSource("{{ url_for('enhancement_stream', resume_id=data.id) }}");
+        es.addEventListener('delta', function (e) { live.textContent += JSON.parse(e.data).text; });
+        es.addEventListener('done', function (e) {
+          es.close();
+          var status = JSON.parse(e.data).status;
+          if (status === 'pending' || status === 'running') { setTimeout(poll, 2000); } else { location.reload(); }
+        });
+        es.onerror = function () { es.close(); setTimeout(poll, 2000); };
+      } else {
+        poll();
+      }
+    </script>
+  {% endif %}
   <div>
     <!-- include the selected template body -->
     {% include template_file %}
@@ -306,36 +420,111 @@ TEMPLATE_3 = """<div class="resume" style="font-family:Segoe UI, Roboto, Arial;"
 </div>
 """
 
-# map the files
+# templates served straight from memory (see app.jinja_loader below)
+EMBEDDED_TEMPLATES = {
+    "base.html": BASE_HTML,
+    "form.html": FORM_HTML,
+    "preview.html": PREVIEW_HTML,
+    "resume_template1.html": TEMPLATE_1,
+    "resume_template2.html": TEMPLATE_2,
+    "resume_template3.html": TEMPLATE_3,
+}
+
+# map the files; templates/ is only a copy now, kept for tools that read it from disk
 WRITE_FILES = {
-    os.path.join(TEMPLATES_DIR, "base.html"): BASE_HTML,
-    os.path.join(TEMPLATES_DIR, "form.html"): FORM_HTML,
-    os.path.join(TEMPLATES_DIR, "preview.html"): PREVIEW_HTML,
-    os.path.join(TEMPLATES_DIR, "resume_template1.html"): TEMPLATE_1,
-    os.path.join(TEMPLATES_DIR, "resume_template2.html"): TEMPLATE_2,
-    os.path.join(TEMPLATES_DIR, "resume_template3.html"): TEMPLATE_3,
+    CSS_FILE: CSS_CONTENT,
+    **{os.path.join(TEMPLATES_DIR, name): contents for name, contents in EMBEDDED_TEMPLATES.items()},
 }
+# hash of the embedded files as last written; lets startup skip comparing every file
+ASSETS_STAMP = os.path.join(TEMPLATES_DIR, ".assets-sha256")
 
-for path, contents in WRITE_FILES.items():
-    write = True
-    if os.path.exists(path):
+
+def assets_hash():
+    h = hashlib.sha256()
+    for path, contents in WRITE_FILES.items():
+        h.update(os.path.relpath(path, BASE_DIR).encode("utf-8"))
+        h.update(b"\0")
+        h.update(contents.strip().encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _assets_stamp(digest):
+    """Embedded contents hash plus size and mtime of each file as written, so edits and deletes show up"""
+    lines = [digest]
+    for path in WRITE_FILES:
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                if f.read().strip() == contents.strip():
-                    write = False
-        except Exception:
-            write = True
-    if write:
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(contents)
+            st = os.stat(path)
+            lines.append(f"{os.path.relpath(path, BASE_DIR)} {st.st_size} {st.st_mtime_ns}")
+        except OSError:
+            lines.append(f"{os.path.relpath(path, BASE_DIR)} missing")
+    return "\n".join(lines)
+
+
+def sync_assets(force=False):
+    """
+    Write the embedded CSS/templates to disk. Unless force is set, only the files are stat'ed
+    (nothing read or written) when the stamp file matches both the embedded contents and the
+    files on disk. Returns the paths written.
+    """
+    digest = assets_hash()
+    if not force:
+        try:
+            with open(ASSETS_STAMP, "r", encoding="utf-8") as f:
+                if f.read().strip() == _assets_stamp(digest):
+                    return []
+        except OSError:
+            pass
+
+    os.makedirs(TEMPLATES_DIR, exist_ok=True)
+    os.makedirs(STATIC_DIR, exist_ok=True)
+    written = []
+    for path, contents in WRITE_FILES.items():
+        write = True
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    if f.read().strip() == contents.strip():
+                        write = False
+            except Exception:
+                write = True
+        if write:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(contents)
+            written.append(path)
+    with open(ASSETS_STAMP, "w", encoding="utf-8") as f:
+        f.write(_assets_stamp(digest))
+    return written
+
+
+sync_assets()
+# part of every preview ETag so a deploy with changed templates doesn't serve stale pages
+TEMPLATES_VERSION = assets_hash()[:12]
 
 # Flask app
 app = Flask(__name__, template_folder=TEMPLATES_DIR, static_folder=STATIC_DIR)
 app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{DB_FILE}"
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options_from_env(SQLITE_PRAGMAS)
 app.secret_key = os.environ.get("FLASK_SECRET", "dev-secret-change-this")
+# embedded templates win; anything else (e.g. resume.html) still comes from templates/
+app.jinja_loader = ChoiceLoader([DictLoader(EMBEDDED_TEMPLATES), FileSystemLoader(TEMPLATES_DIR)])
+# compiled templates are kept on disk so restarted and sibling workers skip compiling them again
+os.makedirs(JINJA_CACHE_DIR, exist_ok=True)
+app.jinja_options = {**app.jinja_options, "bytecode_cache": FileSystemBytecodeCache(JINJA_CACHE_DIR)}
 
 db = SQLAlchemy(app)
+# gzip/brotli for HTML and JSON responses (COMPRESS_* variables, see http_compress.py)
+compressor = compressor_from_env(app)
+
+
+@app.cli.command("sync-assets")
+def sync_assets_command():
+    """Rewrite static/style.css and templates/*.html from the embedded copies"""
+    written = sync_assets(force=True)
+    print(f"{len(written)} file(s) updated")
+    for path in written:
+        print(" ", os.path.relpath(path, BASE_DIR))
 
 # ---------- Validation Functions ----------
 def validate_phone(phone):
@@ -363,24 +552,89 @@ def count_words(text):
         return 0
     return len(text.split())
 
-def enhance_summary_with_ai(raw_summary: str) -> str:
-    if not raw_summary or not llm:
+# Previous Gemini rewrites, shared across workers and restarts
+enhancement_cache = EnhancementCache(
+    ENHANCEMENT_CACHE_FILE,
+    ttl=ENHANCEMENT_CACHE_TTL_DAYS * 24 * 3600,
+    max_entries=ENHANCEMENT_CACHE_MAX_ENTRIES,
+)
+# Identical prompts that arrive together share one Gemini call
+llm_flights = SingleFlight()
+
+def _gemini_options(timeout):
+    # the RPC deadline: without it a hung call holds a scheduler thread long after the caller gave up
+    return {"request_options": {"timeout": max(1.0, timeout)}} if timeout is not None else {}
+
+def _gemini_complete(prompt, system=None, size=1, timeout=None):
+    return get_llm().complete(prompt, **_gemini_options(timeout)).text
+
+# Batches concurrent enhancement prompts and keeps Gemini calls within LLM_RPM / LLM_TPM
+llm_scheduler = scheduler_from_env(_gemini_complete)
+# Stops calling Gemini after repeated failures, probing again after AI_BREAKER_RESET seconds
+llm_breaker = CircuitBreaker(failure_threshold=AI_BREAKER_FAILURES, reset_timeout=AI_BREAKER_RESET)
+ai_stats = {"timeouts": 0, "errors": 0}
+
+def _stream_gemini(prompt, on_delta, deadline):
+    llm_scheduler.reserve(prompt)
+    parts = []
+    options = _gemini_options(deadline - time.monotonic())
+    for resp in iter_with_deadline(lambda: get_llm().stream_complete(prompt, **options), deadline):
+        delta = resp.delta or ""
+        parts.append(delta)
+        on_delta(delta)
+    return "".join(parts)
+
+def enhance_summary_with_ai(raw_summary: str, on_delta=None) -> str:
+    """
+    Rewrite a summary with Gemini. If on_delta is given and AI_STREAMING is on, the completion
+    is streamed and on_delta(text) is called for every chunk as it arrives. Provider errors,
+    timeouts and an open circuit are raised; the caller marks the enhancement as failed.
+    """
+    if not raw_summary or not ai_available():
         return raw_summary
 
+    cached = enhancement_cache.get(raw_summary, SUMMARY_PROMPT_VERSION, GEMINI_MODEL)
+    if cached is not None:
+        if on_delta:
+            on_delta(cached)
+        return cached
+
     prompt = (
         "Rewrite the following professional summary to be concise, clear, "
         "impactful, and ATS-friendly. Keep it between 40-80 words, remove first person pronouns, "
         "and focus on achievements and skills. Make it suitable for a resume:\n\n"
         f"{raw_summary}"
     )
+
+    deadline = time.monotonic() + AI_LATENCY_BUDGET
+
+    def call():
+        remaining = max(0.0, deadline - time.monotonic())
+        if on_delta and AI_STREAMING and hasattr(get_llm(), "stream_complete"):
+            text = llm_breaker.call(_stream_gemini, prompt, on_delta, deadline).strip()
+        else:
+            text = llm_breaker.call(llm_scheduler.complete, prompt, timeout=remaining).strip()
+        if text:
+            enhancement_cache.put(raw_summary, SUMMARY_PROMPT_VERSION, GEMINI_MODEL, text)
+        return text
+
+    key = EnhancementCache.make_key(raw_summary, SUMMARY_PROMPT_VERSION, GEMINI_MODEL)
     try:
-        resp = llm.complete(prompt)
-        text = resp.text.strip()
+        text = llm_flights.do(key, call, timeout=AI_LATENCY_BUDGET)
         return text or raw_summary
+    except TimeoutError:
+        ai_stats["timeouts"] += 1
+        print(f"Gemini enhancement exceeded {AI_LATENCY_BUDGET}s budget")
+        raise
+    except CircuitOpen:
+        raise
     except Exception as e:
+        ai_stats["errors"] += 1
         print("Gemini enhancement failed:", e)
-        return raw_summary
+        raise
 
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
 
 class Resume(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -389,12 +643,24 @@ class Resume(db.Model):
     email = db.Column(db.String(250))
     phone = db.Column(db.String(100))
     profile_link = db.Column(db.String(500))
-    summary = db.Column(db.Text)
-    experience = db.Column(db.Text)
-    education = db.Column(db.Text)
-    projects = db.Column(db.Text)
-    skills = db.Column(db.Text)
+    summary = db.Column(CompressedText)
+    experience = db.Column(CompressedText)
+    education = db.Column(CompressedText)
+    projects = db.Column(CompressedText)
+    skills = db.Column(CompressedText)
     template = db.Column(db.String(80), default="template1")
+    # the Text columns above and summary_enhanced are deflate-compressed (text_compression.py)
+    # AI rewrite of summary, filled in by the background enhancement pool
+    summary_enhanced = db.Column(CompressedText)
+    enhancement_status = db.Column(db.String(20))  # None, "pending", "running", "done" or "failed"
+    # bumped by SQLAlchemy on every UPDATE; previews are cached and ETagged per version
+    version = db.Column(db.Integer, nullable=False, default=1)
+    updated_at = db.Column(db.DateTime, default=lambda: _utcnow(), onupdate=lambda: _utcnow())
+
+    # hash of the submitted form (see submission_fingerprint); identical submissions map to one row
+    fingerprint = db.Column(db.String(64), unique=True, index=True)
+
+    __mapper_args__ = {"version_id_col": version}
 
     def to_dictionary(self):
         return {
@@ -404,7 +670,9 @@ class Resume(db.Model):
             "email": self.email,
             "phone": self.phone,
             "profile_link": self.profile_link,
-            "summary": self.summary or "",
+            "summary": (self.summary_enhanced if self.enhancement_status == "done" and self.summary_enhanced else self.summary) or "",
+            "original_summary": self.summary or "",
+            "enhancement_status": self.enhancement_status,
             "experience": self.experience or "",
             "education": self.education or "",
             "projects": self.projects or "",
@@ -412,8 +680,300 @@ class Resume(db.Model):
             "template": self.template or "template1",
         }
 
+    # columns the listing API loads; the large Text fields stay in the database
+    LIST_COLUMNS = ("id", "full_name", "title", "email", "template", "enhancement_status", "updated_at")
+
+    def to_list_dictionary(self):
+        return {
+            "id": self.id,
+            "full_name": self.full_name,
+            "title": self.title,
+            "email": self.email,
+            "template": self.template or "template1",
+            "enhancement_status": self.enhancement_status,
+            "updated_at": self.updated_at.isoformat() + "Z" if self.updated_at else None,
+        }
+
+class IdempotencyKey(db.Model):
+    key = db.Column(db.String(255), primary_key=True)
+    resume_id = db.Column(db.Integer, nullable=False)
+    fingerprint = db.Column(db.String(64), nullable=False)
+    created = db.Column(db.DateTime, nullable=False, default=lambda: _utcnow(), index=True)
+
+class CompressionDictionary(db.Model):
+    """Shared zlib dictionaries for CompressedText columns; the newest one is used for writes"""
+    id = db.Column(db.Integer, primary_key=True)
+    data = db.Column(db.LargeBinary, nullable=False)
+    created = db.Column(db.DateTime, nullable=False, default=lambda: _utcnow())
+
+def submission_fingerprint(data):
+    """
+    Hash of everything that shapes the resume, incl. the AI choice. Spaces and tabs within a
+    line don't count; line breaks do, since nl2br shows them.
+    """
+    h = hashlib.sha256()
+    for field in ("full_name", "title", "email", "phone", "profile_link", "summary",
+                  "experience", "education", "projects", "skills", "template", "enhance_ai"):
+        value = "\n".join(" ".join(line.split()) for line in str(data.get(field) or "").strip().splitlines())
+        if field in ("email", "profile_link"):
+            value = value.lower()
+        h.update(field.encode("utf-8") + b"=" + value.encode("utf-8") + b"\0")
+    return h.hexdigest()
+
+# Columns added after resumes.db was first created; create_all() won't add them to an existing table
+SCHEMA_UPGRADES = {
+    "summary_enhanced": "TEXT",
+    "enhancement_status": "VARCHAR(20)",
+    "version": "INTEGER NOT NULL DEFAULT 1",
+    "updated_at": "DATETIME",
+    "fingerprint": "VARCHAR(64)",
+}
+
+def add_column(name, ddl):
+    # SQLite has no ADD COLUMN IF NOT EXISTS; another worker starting up may have just added it
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE resume ADD COLUMN {name} {ddl}"))
+    except OperationalError as e:
+        if "duplicate column" not in str(e):
+            raise
+
+def create_tables():
+    # create_all checks for each table before creating it, so a worker starting alongside
+    # this one can win in between; the second pass then sees that table and skips it
+    try:
+        db.create_all()
+    except OperationalError as e:
+        if "already exists" not in str(e):
+            raise
+        db.create_all()
+
+def upgrade_schema():
+    existing = {c["name"] for c in inspect(db.engine).get_columns("resume")}
+    for name, ddl in SCHEMA_UPGRADES.items():
+        if name not in existing:
+            add_column(name, ddl)
+    with db.engine.begin() as conn:
+        if "updated_at" not in existing:
+            # rows from before updated_at existed count as modified at upgrade time
+            conn.execute(text("UPDATE resume SET updated_at = CURRENT_TIMESTAMP WHERE updated_at IS NULL"))
+        # ALTER TABLE can't add a UNIQUE column; rows from before this stay NULL, which the index allows
+        conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ix_resume_fingerprint ON resume (fingerprint)"))
+
+# ---------- Full-text search (resume_search.py) ----------
+search_enabled = False
+
+# The index is updated in the same transaction as the row. Bulk query.update()/delete()
+# skips these events; run `flask --app appALL search-reindex` after one that changes text.
+@event.listens_for(Resume, "before_update")
+@event.listens_for(Resume, "before_delete")
+def _unindex_resume(mapper, connection, target):
+    if search_enabled:
+        resume_search.unindex_document(connection, target.id)
+
+@event.listens_for(Resume, "after_insert")
+@event.listens_for(Resume, "after_update")
+def _index_resume(mapper, connection, target):
+    if search_enabled:
+        resume_search.index_document(connection, target.id)
+
+# Normalized skills -> resume ids (skill_index.py), maintained the same way as the search index
+@event.listens_for(Resume, "after_insert")
+def _index_new_skills(mapper, connection, target):
+    skill_index.index_skills(connection, target.id, target.skills)
+
+@event.listens_for(Resume, "after_update")
+def _reindex_skills(mapper, connection, target):
+    if inspect(target).attrs.skills.history.has_changes():
+        skill_index.index_skills(connection, target.id, target.skills)
+
+@event.listens_for(Resume, "after_delete")
+def _unindex_skills(mapper, connection, target):
+    skill_index.remove_skills(connection, target.id)
+
+def backfill_skills():
+    with db.engine.begin() as conn:
+        rows = db.session.query(Resume.id, Resume.skills).yield_per(1000)
+        return skill_index.rebuild(conn, ((row.id, row.skills) for row in rows))
+
+def reindex_search():
+    with db.engine.begin() as conn:
+        return resume_search.rebuild(conn)
+
+def has_resumes():
+    with db.engine.connect() as conn:
+        return conn.execute(text("SELECT 1 FROM resume LIMIT 1")).first() is not None
+
+def _load_compression_dictionary(dict_id):
+    with db.engine.connect() as conn:
+        return conn.execute(select(CompressionDictionary.data).where(CompressionDictionary.id == dict_id)).scalar()
+
+def load_compression_dictionaries():
+    with db.engine.connect() as conn:
+        rows = conn.execute(select(CompressionDictionary.id, CompressionDictionary.data)
+                            .order_by(CompressionDictionary.id)).all()
+    for i, row in enumerate(rows):
+        text_compression.register_dictionary(row.id, row.data, active=i == len(rows) - 1)
+    text_compression.set_dictionary_loader(_load_compression_dictionary)
+
+COMPRESSED_COLUMNS = ("summary", "experience", "education", "projects", "skills", "summary_enhanced")
+
+def compress_resume_text(retrain=False, sample_size=2000, batch_size=500):
+    """
+    Train a dictionary from existing rows (if there is none yet or retrain is set), then
+    rewrite every row so its text columns use it. Returns (dictionary id, rows rewritten).
+    """
+    table = Resume.__table__
+    if retrain or not text_compression.active_dictionary_id():
+        with db.engine.connect() as conn:
+            rows = conn.execute(select(*(table.c[name] for name in COMPRESSED_COLUMNS))
+                                .order_by(table.c.id.desc()).limit(sample_size)).all()
+        samples = [value for row in rows for value in row if value]
+        data = text_compression.train_dictionary(samples)
+        if data:
+            entry = CompressionDictionary(data=data)
+            db.session.add(entry)
+            db.session.commit()
+            text_compression.register_dictionary(entry.id, data, active=True)
+
+    rewritten, last_id = 0, 0
+    while True:
+        with db.engine.begin() as conn:
+            rows = conn.execute(select(table.c.id, *(table.c[name] for name in COMPRESSED_COLUMNS))
+                                .where(table.c.id > last_id).order_by(table.c.id).limit(batch_size)).all()
+            for row in rows:
+                # core UPDATE: same content, so no version bump and no search/skill reindex;
+                # updated_at is passed through so the column's onupdate doesn't touch it
+                conn.execute(table.update().where(table.c.id == row.id).values(
+                    updated_at=table.c.updated_at, **{name: getattr(row, name) for name in COMPRESSED_COLUMNS}))
+        if not rows:
+            break
+        rewritten += len(rows)
+        last_id = rows[-1].id
+    return text_compression.active_dictionary_id(), rewritten
+
+def init_database():
+    global search_enabled
+    install_pragmas(db.engine, SQLITE_PRAGMAS)
+    # resume_fts reads resume text through this (see resume_search.SOURCE_VIEW)
+    resume_search.install_text_function(db.engine, text_compression.decompress_text)
+    create_tables()
+    upgrade_schema()
+    load_compression_dictionaries()
+    with db.engine.begin() as conn:
+        search_enabled = resume_search.fts5_available(conn)
+        created = search_enabled and resume_search.create_index(conn)
+    # rebuilding here would run once per worker on every start; leave it to the CLI
+    if created and has_resumes():
+        print("✗ Search index is empty — run `flask --app appALL search-reindex`")
+    elif not search_enabled:
+        print("✗ SQLite was built without FTS5 — /search disabled")
+    with db.engine.begin() as conn:
+        created = skill_index.create_table(conn)
+    if created and has_resumes():
+        print("✗ Skill index is empty — run `flask --app appALL skills-backfill`")
+
 with app.app_context():
-    db.create_all()
+    init_database()
+
+@app.cli.command("compress-text")
+@click.option("--retrain", is_flag=True, help="Train a new dictionary even if one exists")
+@click.option("--vacuum", is_flag=True, help="VACUUM afterwards so the file actually shrinks")
+def compress_text_command(retrain, vacuum):
+    """Compress the resume text columns in place with a dictionary trained on existing rows"""
+    before = os.path.getsize(DB_FILE) if os.path.exists(DB_FILE) else 0
+    dict_id, rows = compress_resume_text(retrain=retrain)
+    print(f"Rewrote {rows} resumes with dictionary {dict_id or '(none)'}")
+    if vacuum:
+        with db.engine.connect() as conn:
+            conn.exec_driver_sql("VACUUM")
+        print(f"{DB_FILE}: {before / 1024:.0f} KB -> {os.path.getsize(DB_FILE) / 1024:.0f} KB")
+
+@app.cli.command("prune-idempotency-keys")
+def prune_idempotency_keys_command():
+    """Delete Idempotency-Keys older than IDEMPOTENCY_TTL_HOURS"""
+    print(f"Deleted {_prune_idempotency_keys()} expired idempotency keys")
+
+@app.cli.command("skills-backfill")
+def skills_backfill_command():
+    """Rebuild the skill posting lists from Resume.skills"""
+    print(f"Indexed skills of {backfill_skills()} resumes")
+
+@app.cli.command("search-reindex")
+def search_reindex_command():
+    """Rebuild the full-text search index from the resume table"""
+    print(f"Indexed {reindex_search()} resumes")
+
+# Summary enhancement runs here so /submit never waits on Gemini
+ai_pool = ThreadPoolExecutor(max_workers=AI_WORKERS, thread_name_prefix="ai-enhance")
+# a "running" claim older than this belongs to a worker that died mid-job and may be taken over
+ENHANCE_CLAIM_TIMEOUT = float(os.environ.get("ENHANCE_CLAIM_TIMEOUT", str(max(60.0, AI_LATENCY_BUDGET * 4))))
+
+# Token streams of enhancements running in this process, followed by the SSE endpoint
+summary_streams = StreamHub()
+
+def _enhance_resume_job(resume_id):
+    text = None
+    try:
+        with app.app_context():
+            r = db.session.get(Resume, resume_id)
+            if r is None or r.enhancement_status != "running":
+                return
+            stream = summary_streams.get(resume_id)
+            try:
+                text = enhance_summary_with_ai(r.summary, on_delta=stream.publish if stream else None)
+                r.summary_enhanced = text
+                r.enhancement_status = "done"
+            except Exception as e:
+                print("Background enhancement failed:", e)
+                r.enhancement_status = "failed"
+            db.session.commit()
+    finally:
+        summary_streams.close(resume_id, text)
+
+def claim_enhancement(resume_id):
+    """
+    Atomically move a pending (or abandoned running) enhancement to "running"; only the
+    one caller that gets True runs it, whichever worker process it is in.
+    """
+    stale = _utcnow() - timedelta(seconds=ENHANCE_CLAIM_TIMEOUT)
+    result = db.session.execute(
+        update(Resume)
+        .where(Resume.id == resume_id)
+        .where((Resume.enhancement_status == "pending")
+               | ((Resume.enhancement_status == "running") & (Resume.updated_at < stale)))
+        # the status shows on the preview page, so bump the version its ETag is built from
+        .values(enhancement_status="running", version=Resume.version + 1, updated_at=_utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+def retry_failed_enhancement(resume_id):
+    """Put a failed enhancement back to pending and queue it; False if it hadn't failed"""
+    if not ai_available():
+        return False
+    result = db.session.execute(
+        update(Resume)
+        .where(Resume.id == resume_id, Resume.enhancement_status == "failed")
+        .values(enhancement_status="pending", version=Resume.version + 1, updated_at=_utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount == 1 and queue_enhancement(resume_id)
+
+def _needs_enhancement_worker(row):
+    if row.enhancement_status == "running":
+        return row.updated_at is not None and row.updated_at < _utcnow() - timedelta(seconds=ENHANCE_CLAIM_TIMEOUT)
+    return row.enhancement_status == "pending"
+
+def queue_enhancement(resume_id):
+    if not claim_enhancement(resume_id):
+        return False
+    # open the stream before the job starts so a reader that connects late still gets every token
+    summary_streams.open(resume_id)
+    ai_pool.submit(_enhance_resume_job, resume_id)
+    return True
 
 @app.template_filter("nl2br")
 def nl2br(value):
@@ -421,6 +981,15 @@ def nl2br(value):
         return ""
     return Markup("<br>".join(Markup.escape(str(value)).splitlines()))
 
+# wkhtmltopdf deflates PDF streams by default; don't add "no-pdf-compression" here
+PDF_OPTIONS = {"page-size":"A4", "encoding":"UTF-8", "margin-top":"12mm","margin-bottom":"12mm","margin-left":"12mm","margin-right":"12mm"}
+
+# Rendered PDFs keyed by resume data + template + css, so re-downloads skip wkhtmltopdf
+pdf_cache = PDFCache(PDF_CACHE_DIR, max_memory_items=PDF_CACHE_MEMORY_ITEMS,
+                     max_disk_bytes=PDF_CACHE_DISK_MB * 1024 * 1024)
+# rendered preview.html as UTF-8 bytes; memory only, keys are unique per (id, version, templates)
+preview_cache = BytesLRU(max_items=PREVIEW_CACHE_ITEMS)
+
 pdf_config = None
 if pdfkit and WKHTMLTOPDF_PATH:
     try:
@@ -429,10 +998,115 @@ if pdfkit and WKHTMLTOPDF_PATH:
         print("pdfkit configuration error:", e)
         pdf_config = None
 
+# Caps concurrent wkhtmltopdf processes across all requests (see render_pool.py)
+renderer = pool_from_env(WKHTMLTOPDF_PATH if pdf_config else None)
+
+# Background render jobs for PDF_MODE=async / ?mode=async downloads, kept in the database
+# (PDF_JOB_* variables, see pdf_jobs.py)
+pdf_jobs = queue_from_env(lambda meta: _pdf_job(meta["resume_id"], meta.get("backend")))
+with app.app_context():
+    pdf_jobs.bind(db.engine)
+
+
+def pdf_available(backend=None):
+    if (backend or PDF_BACKEND) == "reportlab":
+        return get_resume_pdf() is not None
+    return bool(pdfkit and (pdf_config or WKHTMLTOPDF_PATH is not None))
+
+
+def _pdf_source(r, backend):
+    """(cache key, resume data, template name) for rendering a resume with the given backend"""
+    data = r.to_dictionary()
+    template_name = f"resume_{r.template}.html"
+    if backend == "reportlab":
+        builder = get_resume_pdf()
+        layout = builder.LAYOUT_VERSION if builder is not None else None
+        return cache_key(data, "", "", "", extra={"backend": backend, "layout": layout}), data, template_name
+    try:
+        template_source = app.jinja_loader.get_source(app.jinja_env, template_name)[0]
+    except Exception:
+        template_source = ""
+    return cache_key(data, template_name, template_source, CSS_CONTENT, extra=PDF_OPTIONS), data, template_name
+
+
+def _pdf_html(template_name, data):
+    html = render_template(template_name, data=data, for_pdf=True)
+    return (
+        "<html><head><meta charset='utf-8'><style>"
+        + CSS_CONTENT
+        + "</style></head><body>"
+        + html
+        + "</body></html>"
+    )
+
+
+def render_resume_pdf(r, backend=None):
+    """Return (cache key, PDF bytes) for a resume; bytes are None if no renderer is available"""
+    backend = backend or PDF_BACKEND
+    key, data, template_name = _pdf_source(r, backend)
+    pdf_bytes = pdf_cache.get(key)
+    if pdf_bytes is not None or not pdf_available(backend):
+        return key, pdf_bytes
+    if backend == "reportlab":
+        builder = get_resume_pdf()
+        pdf_bytes = builder.render_pdf_bytes(builder.from_web_data(data))
+    else:
+        pdf_bytes = renderer.render(_pdf_html(template_name, data), PDF_OPTIONS)
+    pdf_cache.put(key, pdf_bytes)
+    return key, pdf_bytes
+
+
+def resume_pdf_file(r, backend=None):
+    """
+    (path, temporary) of the resume's PDF on disk, or None if no renderer is available.
+    On a cache miss the renderer writes straight to a file that is then moved into the disk
+    cache, so the PDF is never held in memory. A temporary path (no disk cache configured)
+    must be removed once it has been sent.
+    """
+    backend = backend or PDF_BACKEND
+    key, data, template_name = _pdf_source(r, backend)
+    path = pdf_cache.path(key)
+    if path is not None:
+        return path, False
+    if not pdf_available(backend):
+        return None
+    # next to the cache files so put_file() is a rename, not a copy
+    tmp_path = temporary_pdf_path(pdf_cache.cache_dir)
+    try:
+        if backend == "reportlab":
+            builder = get_resume_pdf()
+            builder.create_pdf(builder.from_web_data(data), tmp_path)
+        else:
+            renderer.render(_pdf_html(template_name, data), PDF_OPTIONS, output_path=tmp_path)
+        path = pdf_cache.put_file(key, tmp_path)
+    except Exception:
+        remove_quietly(tmp_path)
+        raise
+    return (path, False) if path else (tmp_path, True)
+
+
+def _pdf_job(resume_id, backend=None):
+    with app.app_context():
+        r = db.session.get(Resume, resume_id)
+        if r is None:
+            raise LookupError(f"resume {resume_id} not found")
+        key, pdf_bytes = render_resume_pdf(r, backend)
+        if pdf_bytes is None:
+            raise RuntimeError("server PDF generation is not available")
+        return key
+
+
+def _export_pdf(resume_id):
+    with app.app_context():
+        r = db.session.get(Resume, resume_id)
+        if r is None:
+            raise LookupError(f"resume {resume_id} not found")
+        return render_resume_pdf(r)[1]
+
 
 @app.route("/", methods=["GET"])
 def index():
-    return render_template("form.html", title="Create Resume", form_data={}, ai_available=bool(llm))
+    return render_template("form.html", title="Create Resume", form_data={}, ai_available=ai_available())
 
 @app.route("/submit", methods=["POST"])
 def submit_form():
@@ -464,13 +1138,30 @@ def submit_form():
     if errors:
         for error in errors:
             flash(error, 'error')
-        return render_template("form.html", title="Create Resume", form_data=data, ai_available=bool(llm))
+        return render_template("form.html", title="Create Resume", form_data=data, ai_available=ai_available())
     
 
-    if use_ai and llm and data["summary"]:
-        print("Enhancing summary with Gemini...")
-        data["summary"] = enhance_summary_with_ai(data["summary"])
-    
+    fingerprint = submission_fingerprint(data)
+    idempotency_key = request.headers.get("Idempotency-Key", "").strip()[:255] or None
+    if idempotency_key:
+        seen = _live_idempotency_key(idempotency_key)
+        if seen is not None:
+            if seen.fingerprint != fingerprint:
+                return jsonify({"error": "Idempotency-Key was already used for a different submission"}), 422
+            if use_ai:
+                retry_failed_enhancement(seen.resume_id)
+            return redirect(url_for("preview_resume", resume_id=seen.resume_id))
+
+    # double-clicks and resubmits land on the resume (and cached enhancement/PDFs) we already have
+    existing_id = _resume_id_for(fingerprint)
+    if existing_id is not None:
+        _remember_idempotency_key(idempotency_key, existing_id, fingerprint)
+        if use_ai:
+            # resubmitting is how a user asks again after the provider failed
+            retry_failed_enhancement(existing_id)
+        return redirect(url_for("preview_resume", resume_id=existing_id))
+
+    enhance_later = bool(use_ai and data["summary"] and ai_available())
     resume = Resume(
         full_name=data["full_name"] or "Unnamed",
         title=data["title"],
@@ -482,50 +1173,401 @@ def submit_form():
         education=data["education"],
         projects=data["projects"],
         skills=data["skills"],
-        template=chosen_template
+        template=chosen_template,
+        enhancement_status="pending" if enhance_later else None,
+        fingerprint=fingerprint,
     )
     db.session.add(resume)
-    db.session.commit()
+    try:
+        db.session.flush()
+        if idempotency_key:
+            db.session.add(IdempotencyKey(key=idempotency_key, resume_id=resume.id, fingerprint=fingerprint))
+        db.session.commit()
+    except IntegrityError:
+        # a concurrent identical submission (or same Idempotency-Key) committed first
+        db.session.rollback()
+        seen = db.session.get(IdempotencyKey, idempotency_key) if idempotency_key else None
+        existing_id = seen.resume_id if seen is not None else _resume_id_for(fingerprint)
+        if existing_id is None:
+            raise
+        return redirect(url_for("preview_resume", resume_id=existing_id))
+    if IDEMPOTENCY_PRUNE_EVERY > 0 and next(_submits) % IDEMPOTENCY_PRUNE_EVERY == 0:
+        # its own write transaction, so only now and then rather than after every submit
+        _prune_idempotency_keys()
+    if enhance_later:
+        queue_enhancement(resume.id)
     return redirect(url_for("preview_resume", resume_id=resume.id))
 
+def _resume_id_for(fingerprint):
+    return db.session.query(Resume.id).filter(Resume.fingerprint == fingerprint).scalar()
+
+def _remember_idempotency_key(key, resume_id, fingerprint):
+    if not key:
+        return
+    try:
+        db.session.add(IdempotencyKey(key=key, resume_id=resume_id, fingerprint=fingerprint))
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+
+# counts resumes created by this process; paces _prune_idempotency_keys
+_submits = itertools.count(1)
+
+def _idempotency_cutoff():
+    return _utcnow() - timedelta(hours=IDEMPOTENCY_TTL_HOURS)
+
+def _live_idempotency_key(key):
+    """The stored key, or None if there is none or it has expired (it is then replaced on commit)"""
+    seen = db.session.get(IdempotencyKey, key)
+    if seen is not None and seen.created < _idempotency_cutoff():
+        db.session.delete(seen)
+        return None
+    return seen
+
+def _prune_idempotency_keys():
+    deleted = IdempotencyKey.query.filter(IdempotencyKey.created < _idempotency_cutoff()).delete(
+        synchronize_session=False)
+    db.session.commit()
+    return deleted
+
 @app.route("/resume/<int:resume_id>", methods=["GET"])
 def preview_resume(resume_id):
-    r = Resume.query.get_or_404(resume_id)
-    data = r.to_dictionary()
+    # only the columns needed for the ETag; the full row is loaded when we actually render
+    row = db.session.query(Resume.version, Resume.updated_at, Resume.enhancement_status).filter(
+        Resume.id == resume_id).first()
+    if row is None:
+        abort(404)
+    if _needs_enhancement_worker(row) and queue_enhancement(resume_id):
+        # left pending, or abandoned mid-job, by a process that has since gone away
+        row = db.session.query(Resume.version, Resume.updated_at, Resume.enhancement_status).filter(
+            Resume.id == resume_id).first()
+
+    if session.get("_flashes"):
+        # the page shows one-off messages, so it can't be cached or revalidated
+        return _render_preview(db.session.get(Resume, resume_id))
+
+    etag = f"{resume_id}-{row.version}-{TEMPLATES_VERSION}"
+    headers = {"Cache-Control": "private, no-cache"}
+    if not is_resource_modified(request.environ, etag=etag, last_modified=row.updated_at):
+        response = Response(status=304, headers=headers)
+    else:
+        key = f"{resume_id}:{row.version}:{TEMPLATES_VERSION}"
+        html = preview_cache.get(key)
+        if html is None:
+            html = _render_preview(db.session.get(Resume, resume_id)).encode("utf-8")
+            preview_cache.put(key, html)
+        response = Response(html, mimetype="text/html", headers=headers)
+        # lets the compression hook reuse its gzip/brotli copy of this exact page
+        response.compress_cache_key = f"preview:{key}"
+    response.set_etag(etag)
+    response.last_modified = row.updated_at
+    return response
+
+def _render_preview(r):
     template_file = f"resume_{r.template}.html"
-    return render_template("preview.html", data=data, template_file=template_file, title="Preview")
+    return render_template("preview.html", data=r.to_dictionary(), template_file=template_file, title="Preview")
+
+@app.route("/resume/<int:resume_id>/enhancement", methods=["GET"])
+def enhancement_status(resume_id):
+    r = Resume.query.get_or_404(resume_id)
+    return jsonify({"id": r.id, "status": r.enhancement_status})
+
+@app.route("/resume/<int:resume_id>/enhancement/stream", methods=["GET"])
+def enhancement_stream(resume_id):
+    """
+    Server-Sent Events: "delta" events carry summary text as Gemini produces it, a final
+    "done" event carries the status and full text once it is saved on the Resume row.
+    """
+    r = Resume.query.get_or_404(resume_id)
+    stream = summary_streams.get(resume_id)
+    status, text = r.enhancement_status, r.to_dictionary()["summary"]
+
+    def events():
+        if stream is not None:
+            for delta in stream.follow(timeout=AI_LATENCY_BUDGET + 10):
+                yield sse("delta", {"text": delta})
+            db.session.expire_all()
+            row = db.session.get(Resume, resume_id)
+            yield sse("done", {"status": row.enhancement_status, "text": row.to_dictionary()["summary"]})
+            return
+        # nothing streaming in this process (finished, or running in another worker): report the row
+        yield sse("done", {"status": status, "text": text})
+
+    return Response(stream_with_context(events()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @app.route("/download/<int:resume_id>", methods=["POST"])
 def download_pdf(resume_id):
     r = Resume.query.get_or_404(resume_id)
+    mode = request.values.get("mode", PDF_MODE)
+    backend = request.values.get("backend", PDF_BACKEND)
+    if mode == "async":
+        try:
+            job = pdf_jobs.submit({"resume_id": r.id, "backend": backend})
+        except QueueFull:
+            return jsonify({"error": "too many PDF jobs are waiting, try again shortly"}), 503, {"Retry-After": "5"}
+        return jsonify(_job_response(job)), 202
+
     data = r.to_dictionary()
     template_name = f"resume_{r.template}.html"
-    html = render_template(template_name, data=data, for_pdf=True)
-    full_html = (
-        "<html><head><meta charset='utf-8'><style>"
-        + CSS_CONTENT
-        + "</style></head><body>"
-        + html
-        + "</body></html>"
-    ).encode("utf-8")
+    try:
+        pdf_file = resume_pdf_file(r, backend)
+        if pdf_file is not None:
+            try:
+                return send_pdf_file(pdf_file[0], f"{r.full_name}_resume.pdf", temporary=pdf_file[1])
+            except FileNotFoundError:
+                # evicted from the disk cache between lookup and open; render it once more
+                pdf_file = resume_pdf_file(r, backend)
+                if pdf_file is not None:
+                    return send_pdf_file(pdf_file[0], f"{r.full_name}_resume.pdf", temporary=pdf_file[1])
+    except PoolBusy:
+        flash("The PDF renderer is busy, please try again in a moment.")
+        return render_template("preview.html", data=data, template_file=template_name, title="Preview"), 503
+    except Exception as e:
+        print("pdfkit failed:", e)
+        flash("Use your browser Print -> Save as PDF.")
+        return render_template("preview.html", data=data, template_file=template_name, title="Preview")
+    flash("Use browser Print -> Save as PDF.")
+    return render_template("preview.html", data=data, template_file=template_name, title="Preview")
+
+
+def _job_response(job):
+    info = job.to_dictionary()
+    info["status_url"] = url_for("job_status", job_id=job.id)
+    if job.status == "done":
+        info["pdf_url"] = url_for("job_pdf", job_id=job.id)
+    return info
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    job = pdf_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "unknown job"}), 404
+    return jsonify(_job_response(job))
 
-    if pdfkit and (pdf_config or WKHTMLTOPDF_PATH is not None):
+
+@app.route("/jobs/<job_id>/pdf", methods=["GET"])
+def job_pdf(job_id):
+    job = pdf_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "unknown job"}), 404
+    if job.status != "done":
+        return jsonify(_job_response(job)), 409
+    r = Resume.query.get_or_404(job.meta["resume_id"])
+    download_name = f"{r.full_name}_resume.pdf"
+    path = pdf_cache.path(job.result)
+    if path is not None:
         try:
-            options = {"page-size":"A4", "encoding":"UTF-8", "margin-top":"12mm","margin-bottom":"12mm","margin-left":"12mm","margin-right":"12mm"}
-            pdf_bytes = pdfkit.from_string(full_html.decode("utf-8"), False, options=options, configuration=pdf_config)
-            return send_file(BytesIO(pdf_bytes), mimetype="application/pdf", as_attachment=True, download_name=f"{r.full_name}_resume.pdf")
-        except Exception as e:
-            print("pdfkit failed:", e)
-            flash("Use your browser Print -> Save as PDF.")
-            return render_template("preview.html", data=data, template_file=template_name, title="Preview")
-    else:
-        flash("Use browser Print -> Save as PDF.")
-        return render_template("preview.html", data=data, template_file=template_name, title="Preview")
+            return send_pdf_file(path, download_name)
+        except FileNotFoundError:
+            pass
+    pdf_bytes = pdf_cache.get(job.result)
+    if pdf_bytes is not None:
+        # no disk tier: the job left the PDF in the memory cache
+        return send_file(BytesIO(pdf_bytes), mimetype="application/pdf", as_attachment=True, download_name=download_name)
+    # evicted since the job finished; render again
+    pdf_file = resume_pdf_file(r, job.meta.get("backend"))
+    if pdf_file is None:
+        return jsonify({"error": "PDF is no longer available"}), 410
+    return send_pdf_file(pdf_file[0], download_name, temporary=pdf_file[1])
+
+def admin_only(view):
+    """
+    For endpoints that read every resume or server internals: 404 unless ADMIN_TOKEN is
+    configured, 403 unless the request sends `Authorization: Bearer <ADMIN_TOKEN>`.
+    """
+    @functools.wraps(view)
+    def guarded(*args, **kwargs):
+        if not ADMIN_TOKEN:
+            abort(404)
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(token.strip().encode(), ADMIN_TOKEN.encode()):
+            return jsonify({"error": "admin token required"}), 403
+        return view(*args, **kwargs)
+    return guarded
+
+@app.route("/export", methods=["POST"])
+@admin_only
+def bulk_export():
+    """Stream a ZIP with one PDF per selected resume and a manifest.json of per-resume results"""
+    params = request.get_json(silent=True) or request.form
+    ids = params.get("ids")
+    if isinstance(ids, str):
+        ids = [i for i in re.split(r"[,\s]+", ids) if i]
+    try:
+        ids = sorted({int(i) for i in ids or []})
+    except (TypeError, ValueError):
+        return jsonify({"error": "ids must be integers"}), 400
+    template = params.get("template")
+    name = params.get("name")
+    if not (ids or template or name):
+        return jsonify({"error": "pass ids or a filter (template, name)"}), 400
+    if not pdf_available():
+        return jsonify({"error": "server PDF generation is not available"}), 503
+
+    query = db.session.query(Resume.id, Resume.full_name)
+    if ids:
+        query = query.filter(Resume.id.in_(ids))
+    if template:
+        query = query.filter(Resume.template == template)
+    if name:
+        query = query.filter(Resume.full_name.ilike(f"%{name}%"))
+    names = dict(query.order_by(Resume.id).limit(EXPORT_MAX_RESUMES).all())
+    # requested ids that don't exist still show up in the manifest as failures
+    items = ids[:EXPORT_MAX_RESUMES] if ids and not (template or name) else sorted(names)
+    if not items:
+        return jsonify({"error": "no resumes matched"}), 404
+
+    def file_name(resume_id):
+        return f"{resume_id}_{secure_filename(names.get(resume_id) or '') or 'resume'}.pdf"
+
+    entries = export_entries(items, _export_pdf, file_name, max_parallel=renderer.workers)
+    return Response(
+        stream_zip(entries),
+        mimetype="application/zip",
+        headers={"Content-Disposition": "attachment; filename=resumes.zip"},
+    )
+
+
+def estimate_resume_count():
+    """
+    Row count without scanning the table: sqlite_stat1 after an ANALYZE, otherwise
+    MAX(id), which is an index lookup and only overcounts by the number of deleted rows.
+    """
+    with db.engine.connect() as conn:
+        try:
+            stat = conn.execute(text("SELECT stat FROM sqlite_stat1 WHERE tbl = 'resume' AND idx IS NULL")).scalar()
+            if stat:
+                return int(stat.split()[0])
+        except Exception:
+            pass  # no ANALYZE yet, so no sqlite_stat1
+        return conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM resume")).scalar()
+
+
+@app.route("/api/resumes", methods=["GET"])
+@admin_only
+def list_resumes():
+    """
+    Keyset-paginated listing: ?limit=50&after=<id from next_after>&order=desc|asc&count=estimate|exact.
+    Only the LIST_COLUMNS are selected; touching any other column on these rows raises.
+    """
+    limit = min(LIST_MAX_LIMIT, max(1, request.args.get("limit", 50, type=int)))
+    after = request.args.get("after", type=int)
+    ascending = request.args.get("order", "desc") == "asc"
+
+    columns = [getattr(Resume, name) for name in Resume.LIST_COLUMNS]
+    query = Resume.query.options(load_only(*columns, raiseload=True))
+    if after is not None:
+        query = query.filter(Resume.id > after if ascending else Resume.id < after)
+    query = query.order_by(Resume.id.asc() if ascending else Resume.id.desc())
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    body = {
+        "items": [r.to_list_dictionary() for r in rows],
+        "limit": limit,
+        "next_after": rows[-1].id if has_more else None,
+    }
+    count = request.args.get("count")
+    if count == "exact":
+        body["total"] = db.session.query(db.func.count(Resume.id)).scalar()
+    elif count == "estimate":
+        body["total_estimate"] = estimate_resume_count()
+    return jsonify(body)
+
+
+@app.route("/search", methods=["GET"])
+def search_resumes():
+    """Ranked full-text search: ?q=python flask&page=1&per_page=20"""
+    if not search_enabled:
+        return jsonify({"error": "search is not available"}), 501
+    query = request.args.get("q", "").strip()
+    page = max(1, request.args.get("page", 1, type=int))
+    per_page = min(SEARCH_MAX_PER_PAGE, max(1, request.args.get("per_page", 20, type=int)))
+    with db.engine.connect() as conn:
+        total, results = resume_search.search(conn, query, limit=per_page, offset=(page - 1) * per_page)
+    for result in results:
+        result["url"] = url_for("preview_resume", resume_id=result["id"])
+    return jsonify({
+        "query": query,
+        "page": page,
+        "per_page": per_page,
+        "total": total,
+        "pages": (total + per_page - 1) // per_page,
+        "results": results,
+    })
+
+
+def _split_skills_arg(name):
+    return [s for s in request.args.get(name, "").split(",") if s.strip()]
+
+
+@app.route("/skills/search", methods=["GET"])
+def search_skills():
+    """Resumes by skill set: ?all=python,sql (every one) &any=flask,django (at least one)"""
+    all_of, any_of = _split_skills_arg("all"), _split_skills_arg("any")
+    page = max(1, request.args.get("page", 1, type=int))
+    per_page = min(SEARCH_MAX_PER_PAGE, max(1, request.args.get("per_page", 50, type=int)))
+    with db.engine.connect() as conn:
+        total, ids = skill_index.find(conn, all_of, any_of, limit=per_page, offset=(page - 1) * per_page)
+    rows = {}
+    if ids:
+        rows = {row.id: row for row in db.session.query(Resume.id, Resume.full_name, Resume.title).filter(Resume.id.in_(ids))}
+    return jsonify({
+        "all": [skill_index.normalize_skill(s) for s in all_of],
+        "any": [skill_index.normalize_skill(s) for s in any_of],
+        "page": page,
+        "per_page": per_page,
+        "total": total,
+        "results": [
+            {"id": i, "full_name": rows[i].full_name, "title": rows[i].title,
+             "url": url_for("preview_resume", resume_id=i)}
+            for i in ids if i in rows
+        ],
+    })
+
+
+@app.route("/skills", methods=["GET"])
+def list_skills():
+    limit = min(500, max(1, request.args.get("limit", 50, type=int)))
+    with db.engine.connect() as conn:
+        return jsonify([{"skill": skill, "resumes": n} for skill, n in skill_index.top_skills(conn, limit)])
+
+
+def _sqlite_settings():
+    with db.engine.connect() as conn:
+        settings = read_pragmas(conn)
+    pool = db.engine.pool
+    settings["pool"] = pool.status() if hasattr(pool, "status") else type(pool).__name__
+    return settings
+
+
+@app.route("/metrics", methods=["GET"])
+@admin_only
+def metrics():
+    return jsonify({
+        "pdf_cache": pdf_cache.stats(),
+        "preview_cache": preview_cache.stats(),
+        "compression": compressor.stats(),
+        "renderer": renderer.stats(),
+        "pdf_jobs": pdf_jobs.stats(),
+        "sqlite": _sqlite_settings(),
+        "llm": {
+            **ai_stats,
+            "breaker": llm_breaker.stats(),
+            "enhancement_cache": enhancement_cache.stats(),
+            "single_flight": llm_flights.stats(),
+            "scheduler": llm_scheduler.stats(),
+        },
+    })
 
 
 if __name__ == "__main__":
     print("Starting Resume Builder app...")
-    if llm:
+    sync_assets(force=True)
+    if get_llm():
         print("✓ Gemini AI enhancements enabled")
     else:
         print("✗ Gemini API key not found — AI enhancements disabled")
@@ -0,0 +1,337 @@
+"""
+Small benchmarks for the resume apps. Run from the repo root, e.g.
+
+    python bench.py backends -n 20
+    python bench.py startup -n 10
+    python bench.py sqlite -n 200
+    python bench.py compression -n 5000
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+
+SAMPLE_RESUME = {
+    "id": 1,
+    "full_name": "Jane Doe",
+    "title": "Senior Software Engineer",
+    "email": "jane@example.com",
+    "phone": "+1-555-010-2030",
+    "profile_link": "https://www.linkedin.com/in/janedoe",
+    "summary": (
+        "Backend engineer with eight years of experience building high traffic web services in Python "
+        "and Go. Led the migration of a monolith to services, cut p99 latency by 40% and mentored a team "
+        "of six engineers. Comfortable owning features from design through on-call."
+    ),
+    "experience": "\n".join([
+        "Acme Corp — Senior Engineer — Designed the billing pipeline processing 2M invoices a month",
+        "Acme Corp — Senior Engineer — Reduced infrastructure cost by 25% through caching and batching",
+        "Globex — Software Engineer — Built the public REST API used by 300 partner integrations",
+        "Globex — Software Engineer — Introduced CI checks that cut production incidents in half",
+        "Initech — Junior Developer — Maintained internal reporting tools in Flask and PostgreSQL",
+    ]),
+    "education": "B.Tech Computer Science | IUST | 2012-2016 | 8.5 CGPA",
+    "projects": "Resume Builder | Flask, ReportLab | Generates PDF resumes | github.com/jane/resume",
+    "skills": "Python, Go, Flask, Django, PostgreSQL, Redis, Docker, Kubernetes, AWS",
+    "template": "template1",
+}
+
+
+def _summarize(name, timings, memory_kb):
+    timings = sorted(timings)
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f"{name:<12} mean {statistics.mean(timings) * 1000:8.1f} ms   "
+          f"p50 {statistics.median(timings) * 1000:8.1f} ms   p95 {p95 * 1000:8.1f} ms   "
+          f"peak mem {memory_kb / 1024:7.1f} MB")
+
+
+def _render_resume_html(data):
+    from jinja2 import Environment, FileSystemLoader
+    from markupsafe import Markup
+
+    env = Environment(loader=FileSystemLoader(os.path.join(BASE_DIR, "templates")), autoescape=True)
+    env.filters["nl2br"] = lambda v: Markup("<br>".join(Markup.escape(str(v or "")).splitlines()))
+    with open(os.path.join(BASE_DIR, "static", "style.css"), encoding="utf-8") as f:
+        css = f.read()
+    body = env.get_template(f"resume_{data['template']}.html").render(data=data, for_pdf=True)
+    return f"<html><head><meta charset='utf-8'><style>{css}</style></head><body>{body}</body></html>"
+
+
+def _backend_child(backend, n):
+    """Runs in a fresh interpreter (see bench_backends); prints timings and peak RSS as JSON"""
+    import resource
+
+    if backend == "reportlab":
+        import resume_pdf
+
+        data = resume_pdf.from_web_data(SAMPLE_RESUME)
+        render = lambda: resume_pdf.render_pdf_bytes(data)
+        usage = resource.RUSAGE_SELF
+    else:
+        import pdfkit
+
+        pdfkit.configuration()
+        html = _render_resume_html(SAMPLE_RESUME)
+        options = {"page-size": "A4", "encoding": "UTF-8", "quiet": ""}
+        render = lambda: pdfkit.from_string(html, False, options=options)
+        # the wkhtmltopdf processes, not this interpreter
+        usage = resource.RUSAGE_CHILDREN
+    render()  # warm imports and font metrics
+    timings = []
+    for _ in range(n):
+        start = time.perf_counter()
+        render()
+        timings.append(time.perf_counter() - start)
+    # ru_maxrss is in KB on Linux
+    print(json.dumps({"timings": timings, "rss_kb": resource.getrusage(usage).ru_maxrss}))
+
+
+def bench_backends(n):
+    """
+    wkhtmltopdf (subprocess per render) vs the in-process ReportLab renderer. Each backend runs
+    in its own interpreter so "peak mem" is the peak RSS of the rendering process for both.
+    """
+    import subprocess
+    import sys
+
+    for backend in ("reportlab", "wkhtmltopdf"):
+        result = subprocess.run(
+            [sys.executable, "-c", f"import bench; bench._backend_child({backend!r}, {n})"],
+            cwd=BASE_DIR, capture_output=True, text=True)
+        if result.returncode != 0:
+            print(f"{backend:<12} skipped: {(result.stderr.strip().splitlines() or ['failed'])[-1]}")
+            continue
+        out = json.loads(result.stdout.strip().splitlines()[-1])
+        _summarize(backend, out["timings"], out["rss_kb"])
+
+
+STARTUP_SNIPPET = (
+    "import resource, time; start = time.perf_counter(); import appALL; "
+    "print(time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"
+)
+
+
+def bench_startup(n):
+    """Cold `import appALL` in a fresh interpreter, plus the slowest modules from -X importtime"""
+    import subprocess
+    import sys
+
+    timings = []
+    peak_kb = 0
+    for _ in range(n):
+        out = subprocess.run([sys.executable, "-c", STARTUP_SNIPPET], cwd=BASE_DIR,
+                             capture_output=True, text=True, check=True).stdout
+        elapsed, rss = out.strip().splitlines()[-1].split()
+        timings.append(float(elapsed))
+        peak_kb = max(peak_kb, int(rss))
+    _summarize("import", timings, peak_kb)
+
+    err = subprocess.run([sys.executable, "-X", "importtime", "-c", "import appALL"], cwd=BASE_DIR,
+                         capture_output=True, text=True, check=True).stderr
+    modules = []
+    for line in err.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            modules.append((int(parts[1]), parts[2].strip()))
+    for cumulative, name in sorted(modules, reverse=True)[:10]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+
+def _sqlite_stress(engine, writers, readers, n):
+    """writers insert n rows each (read-then-write transactions like a Session does) while readers scan"""
+    import threading
+
+    from sqlalchemy import text
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE IF NOT EXISTS stress (id INTEGER PRIMARY KEY, body TEXT)")
+    counts = {"commits": 0, "locked": 0}
+    lock = threading.Lock()
+    stop = threading.Event()
+    body = SAMPLE_RESUME["experience"] * 4
+
+    def write():
+        for _ in range(n):
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text("SELECT COUNT(*) FROM stress")).scalar()
+                    conn.execute(text("INSERT INTO stress (body) VALUES (:b)"), {"b": body})
+                with lock:
+                    counts["commits"] += 1
+            except Exception as e:
+                if "locked" not in str(e):
+                    raise
+                with lock:
+                    counts["locked"] += 1
+
+    def read():
+        while not stop.is_set():
+            with engine.connect() as conn:
+                conn.execute(text("SELECT id, length(body) FROM stress ORDER BY id DESC LIMIT 50")).fetchall()
+
+    threads = [threading.Thread(target=read) for _ in range(readers)]
+    for t in threads:
+        t.start()
+    start = time.perf_counter()
+    writer_threads = [threading.Thread(target=write) for _ in range(writers)]
+    for t in writer_threads:
+        t.start()
+    for t in writer_threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for t in threads:
+        t.join()
+    return elapsed, counts
+
+
+def bench_sqlite(n):
+    """Concurrent commits against a stock SQLite engine vs the sqlite_tuning.py settings"""
+    import tempfile
+
+    from sqlalchemy import create_engine
+
+    import sqlite_tuning
+
+    writers, readers = 8, 4
+    with tempfile.TemporaryDirectory() as tmp:
+        pragmas = sqlite_tuning.pragmas_from_env()
+        configs = {
+            "default": (create_engine(f"sqlite:///{os.path.join(tmp, 'default.db')}"), None),
+            "tuned": (create_engine(f"sqlite:///{os.path.join(tmp, 'tuned.db')}",
+                                    **sqlite_tuning.engine_options_from_env(pragmas)), pragmas),
+        }
+        for name, (engine, engine_pragmas) in configs.items():
+            if engine_pragmas:
+                sqlite_tuning.install_pragmas(engine, engine_pragmas)
+            elapsed, counts = _sqlite_stress(engine, writers, readers, n)
+            print(f"{name:<12} {counts['commits'] / elapsed:8.0f} commits/s   "
+                  f"{counts['commits']:6d} ok   {counts['locked']:4d} 'database is locked'   "
+                  f"{elapsed:6.2f} s ({writers} writers, {readers} readers)")
+            engine.dispose()
+
+
+def _synthetic_resumes(n, seed=7):
+    """n resumes shaped like SAMPLE_RESUME with the text shuffled around, so they share phrasing but differ"""
+    import random
+
+    rng = random.Random(seed)
+    lines = SAMPLE_RESUME["experience"].splitlines()
+    companies = ["Acme Corp", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries", "Wayne Enterprises"]
+    roles = ["Software Engineer", "Senior Engineer", "Backend Developer", "Data Engineer", "Tech Lead"]
+    skills = SAMPLE_RESUME["skills"].split(", ") + ["Java", "React", "SQL", "Terraform", "Kafka", "GraphQL"]
+    resumes = []
+    for i in range(n):
+        experience = []
+        for _ in range(rng.randint(3, 8)):
+            achievement = rng.choice(lines).split(" — ")[-1]
+            experience.append(f"{rng.choice(companies)} — {rng.choice(roles)} — {achievement} "
+                              f"({rng.randint(2010, 2024)}, team of {rng.randint(2, 20)})")
+        summary_words = SAMPLE_RESUME["summary"].split()
+        rng.shuffle(summary_words)
+        resumes.append({
+            "summary": " ".join(summary_words[:rng.randint(30, len(summary_words))]),
+            "experience": "\n".join(experience),
+            "education": SAMPLE_RESUME["education"].replace("2012-2016", f"{2000 + i % 20}-{2004 + i % 20}"),
+            "projects": SAMPLE_RESUME["projects"],
+            "skills": ", ".join(rng.sample(skills, rng.randint(4, 10))),
+        })
+    return resumes
+
+
+def bench_compression(n):
+    """CompressedText: size with/without a trained dictionary, codec throughput and database file size"""
+    import subprocess
+    import sys
+    import tempfile
+
+    import text_compression as tc
+
+    values = [v for resume in _synthetic_resumes(n) for v in resume.values()]
+    half = len(values) // 2
+    # train on one half and measure on the other, as a real dictionary sees new rows
+    tc.register_dictionary(1, tc.train_dictionary(values[:half]))
+    test = values[half:]
+    raw = sum(len(v.encode("utf-8")) for v in test)
+    for label, dict_id in (("zlib", 0), ("zlib+dict", 1)):
+        start = time.perf_counter()
+        packed = [tc.compress_text(v, dict_id=dict_id) for v in test]
+        encode = time.perf_counter() - start
+        start = time.perf_counter()
+        for p in packed:
+            tc.decompress_text(p)
+        decode = time.perf_counter() - start
+        size = sum(len(p) if isinstance(p, bytes) else len(p.encode("utf-8")) for p in packed)
+        print(f"{label:<12} {raw / 1024:8.0f} KB -> {size / 1024:6.0f} KB ({size / raw:5.1%})   "
+              f"encode {raw / encode / 2**20:6.1f} MB/s   decode {raw / decode / 2**20:6.1f} MB/s")
+
+    # the real appALL schema (search index, skill postings and all), in a fresh interpreter per
+    # variant because appALL opens DB_FILE at import
+    with tempfile.TemporaryDirectory() as tmp:
+        for label in ("plain", "compressed"):
+            env = dict(os.environ, DB_FILE=os.path.join(tmp, f"{label}.db"),
+                       ENHANCEMENT_CACHE_FILE=os.path.join(tmp, f"{label}-enhancements.db"),
+                       PDF_CACHE_DIR=os.path.join(tmp, "pdf_cache"), JINJA_CACHE_DIR=os.path.join(tmp, "jinja"))
+            result = subprocess.run(
+                [sys.executable, "-c", f"import bench; bench._appall_db_child({label!r}, {n})"],
+                cwd=BASE_DIR, env=env, capture_output=True, text=True)
+            if result.returncode != 0:
+                print(f"{label:<12} failed: {(result.stderr.strip().splitlines() or ['?'])[-1]}")
+                continue
+            out = json.loads(result.stdout.strip().splitlines()[-1])
+            parts = "   ".join(f"{name} {kb:.0f}" for name, kb in out["objects_kb"].items())
+            print(f"{label:<12} {n} resumes: {out['file_kb']:8.0f} KB on disk   ({parts} KB)")
+
+
+def _appall_db_child(label, n):
+    """Runs in a fresh interpreter with DB_FILE pointing at a scratch file (see bench_compression)"""
+    import text_compression as tc
+
+    if label == "plain":
+        # everything stays under the threshold, so CompressedText stores plain TEXT
+        tc.MIN_COMPRESS_BYTES = float("inf")
+    import appALL
+
+    with appALL.app.app_context():
+        for i, resume in enumerate(_synthetic_resumes(n)):
+            appALL.db.session.add(appALL.Resume(full_name=f"Person {i}", title="Engineer", **resume))
+            if i % 500 == 499:
+                appALL.db.session.commit()
+        appALL.db.session.commit()
+        if label == "compressed":
+            appALL.compress_resume_text(retrain=True)
+        with appALL.db.engine.connect() as conn:
+            conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+            conn.exec_driver_sql("VACUUM")
+            try:
+                rows = conn.exec_driver_sql(
+                    "SELECT CASE WHEN name LIKE 'resume_fts%' THEN 'fts' WHEN name LIKE '%skill%' THEN 'skills'"
+                    " WHEN name = 'resume' THEN 'resume' ELSE 'other' END AS part, SUM(pgsize)"
+                    " FROM dbstat GROUP BY part ORDER BY part").fetchall()
+            except Exception:
+                rows = []  # SQLite built without dbstat
+    print(json.dumps({"file_kb": os.path.getsize(appALL.DB_FILE) / 1024,
+                      "objects_kb": {part: size / 1024 for part, size in rows}}))
+
+
+BENCHMARKS = {
+    "backends": bench_backends,
+    "startup": bench_startup,
+    "sqlite": bench_sqlite,
+    "compression": bench_compression,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("-n", type=int, default=20, help="iterations")
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](args.n)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import io
+import json
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, non-seekable file that hands written bytes back to the generator"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self):
+        chunks, self._chunks = self._chunks, []
+        return b"".join(chunks)
+
+
+def stream_zip(entries):
+    """
+    Yield a ZIP archive chunk by chunk from an iterable of (name, bytes) pairs.
+    Only the entry currently being written is held in memory.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w") as zf:
+        for name, content in entries:
+            info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+            # PDFs are already compressed, everything else (manifest) is deflated
+            info.compress_type = zipfile.ZIP_STORED if name.endswith(".pdf") else zipfile.ZIP_DEFLATED
+            zf.writestr(info, content)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    chunk = sink.drain()
+    if chunk:
+        yield chunk
+
+
+def render_parallel(items, render_fn, max_parallel=4):
+    """
+    Run render_fn(item) for every item with at most max_parallel in flight and
+    yield (item, result, error) in completion order.
+    """
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix="pdf-export") as executor:
+        pending = {}
+
+        def fill():
+            while len(pending) < max_parallel:
+                try:
+                    item = next(items)
+                except StopIteration:
+                    return
+                pending[executor.submit(render_fn, item)] = item
+
+        fill()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                try:
+                    yield item, future.result(), None
+                except Exception as e:
+                    yield item, None, str(e) or e.__class__.__name__
+            fill()
+
+
+def export_entries(items, render_fn, name_fn, max_parallel=4):
+    """(name, bytes) entries for stream_zip: one PDF per item plus manifest.json"""
+    manifest = []
+    for item, pdf_bytes, error in render_parallel(items, render_fn, max_parallel):
+        name = name_fn(item)
+        if error is None and pdf_bytes is None:
+            error = "server PDF generation is not available"
+        if error is None:
+            manifest.append({"id": item, "file": name, "status": "ok", "bytes": len(pdf_bytes)})
+            yield name, pdf_bytes
+        else:
+            manifest.append({"id": item, "file": None, "status": "failed", "error": error})
+    yield "manifest.json", json.dumps(manifest, indent=2).encode("utf-8")
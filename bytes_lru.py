@@ -0,0 +1,58 @@
+import threading
+from collections import OrderedDict
+
+
+class BytesLRU:
+    """
+    In-memory LRU of bytes values, bounded by item count and total size. Used for rendered
+    previews, compressed response bodies and as the memory tier of PDFCache.
+    """
+
+    def __init__(self, max_items=32, max_bytes=32 * 1024 * 1024):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store value; anything bigger than max_bytes is not kept at all"""
+        with self._lock:
+            if len(value) > self.max_bytes:
+                return
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._items[key] = value
+            self._bytes += len(value)
+            while self._items and (len(self._items) > self.max_items or self._bytes > self.max_bytes):
+                _, evicted = self._items.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def size_bytes(self):
+        return self._bytes
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "items": len(self._items), "bytes": self._bytes}
@@ -0,0 +1,95 @@
+import hashlib
+import sqlite3
+import threading
+import time
+
+
+def normalize_text(text):
+    """Whitespace differences shouldn't cause a second LLM call"""
+    return " ".join((text or "").split())
+
+
+class EnhancementCache:
+    """
+    SQLite-backed cache of AI enhancements keyed by normalized input text,
+    prompt version and model name. Entries expire after `ttl` seconds and the
+    least recently used ones are dropped once there are more than `max_entries`.
+    Both are enforced every `evict_every` puts or `evict_interval` seconds, not on each put,
+    so the table can briefly run a little over the cap.
+    """
+
+    def __init__(self, path, ttl=30 * 24 * 3600, max_entries=20000, evict_every=100, evict_interval=300):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.evict_every = evict_every
+        self.evict_interval = evict_interval
+        self._puts_since_evict = 0
+        self._last_evict = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS enhancement ("
+                " key TEXT PRIMARY KEY, result TEXT NOT NULL,"
+                " created REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_enhancement_last_used ON enhancement (last_used)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_enhancement_created ON enhancement (created)")
+
+    @staticmethod
+    def make_key(text, prompt_version, model):
+        raw = "\0".join((prompt_version or "", model or "", normalize_text(text)))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, text, prompt_version, model):
+        key = self.make_key(text, prompt_version, model)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result, created FROM enhancement WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                self.misses += 1
+                if row is not None:
+                    with self._conn:
+                        self._conn.execute("DELETE FROM enhancement WHERE key = ?", (key,))
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE enhancement SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, text, prompt_version, model, result):
+        key = self.make_key(text, prompt_version, model)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO enhancement (key, result, created, last_used) VALUES (?, ?, ?, ?)",
+                (key, result, now, now),
+            )
+            self._puts_since_evict += 1
+            if (self._puts_since_evict >= self.evict_every
+                    or time.monotonic() - self._last_evict >= self.evict_interval):
+                self._evict(now)
+
+    def _evict(self, now):
+        self._puts_since_evict = 0
+        self._last_evict = time.monotonic()
+        self._conn.execute("DELETE FROM enhancement WHERE created < ?", (now - self.ttl,))
+        count = self._conn.execute("SELECT COUNT(*) FROM enhancement").fetchone()[0]
+        if count > self.max_entries:
+            # trim a little below the cap so we don't evict on every insert
+            excess = count - int(self.max_entries * 0.9)
+            self._conn.execute(
+                "DELETE FROM enhancement WHERE key IN"
+                " (SELECT key FROM enhancement ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM enhancement").fetchone()[0]
+            return {"hits": self.hits, "misses": self.misses, "entries": entries}
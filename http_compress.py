@@ -0,0 +1,105 @@
+import gzip
+import os
+
+from flask import request
+
+from bytes_lru import BytesLRU
+
+try:
+    import brotli
+except Exception:
+    try:
+        import brotlicffi as brotli
+    except Exception:
+        brotli = None
+
+# PDFs are left alone: ReportLab and wkhtmltopdf already deflate their content streams by default
+DEFAULT_MIMETYPES = (
+    "text/html", "text/css", "text/plain", "text/xml", "text/csv",
+    "application/json", "application/javascript", "application/xml", "image/svg+xml",
+)
+
+
+def supported_encodings():
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def compress_body(data, encoding, gzip_level=6, brotli_quality=5):
+    if encoding == "br":
+        return brotli.compress(data, quality=brotli_quality)
+    # mtime=0 keeps the output (and any cached copy of it) byte-for-byte stable
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+class Compressor:
+    """
+    after_request hook compressing text responses with brotli (if installed) or gzip, as
+    the client's Accept-Encoding allows. Responses below `min_size`, streamed or file
+    responses, and anything already encoded are sent unchanged. A view can set
+    `response.compress_cache_key` to a string that identifies the body (e.g. resume id +
+    version); compressed copies are then kept and reused instead of recompressed.
+    """
+
+    def __init__(self, app=None, min_size=500, mimetypes=DEFAULT_MIMETYPES, gzip_level=6,
+                 brotli_quality=5, cache_items=512):
+        self.min_size = min_size
+        self.mimetypes = set(mimetypes)
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        # memory-only byte LRU; see compress_cache_key above
+        self.cache = BytesLRU(max_items=cache_items)
+        self.counts = {"compressed": 0, "bytes_in": 0, "bytes_out": 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.after_request(self.after_request)
+        app.extensions["http_compress"] = self
+
+    def after_request(self, response):
+        if response.mimetype not in self.mimetypes:
+            return response
+        response.vary.add("Accept-Encoding")
+        if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+                or "Content-Encoding" in response.headers or request.method == "HEAD"):
+            return response
+        encoding = request.accept_encodings.best_match(supported_encodings())
+        if encoding is None:
+            return response
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+
+        cache_key = getattr(response, "compress_cache_key", None)
+        variant_key = f"{cache_key}:{encoding}" if cache_key else None
+        body = self.cache.get(variant_key) if variant_key else None
+        if body is None:
+            body = compress_body(data, encoding, self.gzip_level, self.brotli_quality)
+            if variant_key:
+                self.cache.put(variant_key, body)
+        response.set_data(body)
+        response.headers["Content-Encoding"] = encoding
+        # a different byte representation of the same content: keep the ETag, but weak
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        self.counts["compressed"] += 1
+        self.counts["bytes_in"] += len(data)
+        self.counts["bytes_out"] += len(body)
+        return response
+
+    def stats(self):
+        return {**self.counts, "encodings": list(supported_encodings()), "variant_cache": self.cache.stats()}
+
+
+def compressor_from_env(app=None):
+    """Build a Compressor configured through COMPRESS_* environment variables"""
+    mimetypes = os.environ.get("COMPRESS_MIMETYPES")
+    return Compressor(
+        app,
+        min_size=int(os.environ.get("COMPRESS_MIN_SIZE", "500")),
+        mimetypes=mimetypes.split(",") if mimetypes else DEFAULT_MIMETYPES,
+        gzip_level=int(os.environ.get("COMPRESS_GZIP_LEVEL", "6")),
+        brotli_quality=int(os.environ.get("COMPRESS_BROTLI_QUALITY", "5")),
+        cache_items=int(os.environ.get("COMPRESS_CACHE_ITEMS", "512")),
+    )
@@ -0,0 +1,253 @@
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+BATCH_PROMPT = (
+    "You will be given {n} independent tasks as a JSON array of strings. "
+    "Complete every task separately and reply with only a JSON array of {n} strings, "
+    "where element i is your answer to task i. Do not add any commentary.\n\n"
+    "Tasks:\n{tasks}"
+)
+
+
+class RateLimitError(Exception):
+    """Raised when the provider keeps rejecting calls for rate limit reasons"""
+
+
+def is_rate_limit_error(e):
+    if isinstance(e, RateLimitError) or "ratelimit" in e.__class__.__name__.lower():
+        return True
+    message = str(e).lower()
+    return any(s in message for s in ("429", "rate limit", "quota", "resource_exhausted", "too many requests"))
+
+
+def estimate_tokens(text):
+    # ~4 characters per token is close enough for budgeting
+    return len(text) // 4 + 1
+
+
+class _Budget:
+    """Token bucket refilled continuously at `per_minute` units per minute"""
+
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.available = per_minute
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / self.rate
+
+    def take(self, amount):
+        self._refill()
+        self.available -= min(amount, self.capacity)
+
+
+class _Request:
+    def __init__(self, prompt, system, deadline=None):
+        self.prompt = prompt
+        self.system = system
+        # time.monotonic() after which nobody is waiting for the answer any more
+        self.deadline = deadline
+        self.future = Future()
+
+
+class BatchScheduler:
+    """
+    Gathers LLM requests for up to `window` seconds and sends requests that share a
+    system prompt as one batched call, then splits the JSON answer back per request.
+    Calls are held back to stay within `rpm` requests and `tpm` tokens per minute,
+    and retried with exponential backoff when the provider reports a rate limit.
+
+    complete_fn(prompt, system, size, timeout) must return the provider's text for one call;
+    `size` is the number of tasks in the prompt so it can scale max_tokens, and `timeout`
+    (seconds, or None) is what is left of the callers' deadline, to be passed on to the
+    provider's own request timeout. Requests whose deadline passes while they wait for a
+    batch, rate budget or a free thread fail with TimeoutError without being sent, so a hung
+    provider can't keep the worker threads busy with answers no one will read.
+    """
+
+    def __init__(self, complete_fn, window=0.05, max_batch=8, rpm=60, tpm=100000,
+                 max_retries=3, max_concurrency=4, output_tokens=400):
+        self.complete_fn = complete_fn
+        self.window = window
+        self.max_batch = max_batch
+        self.max_retries = max_retries
+        self.output_tokens = output_tokens
+        self._requests = _Budget(rpm)
+        self._tokens = _Budget(tpm)
+        self._budget_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm-batch")
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.stats_counts = {"requests": 0, "calls": 0, "batched_calls": 0, "rate_limited": 0,
+                             "split_failures": 0, "expired": 0}
+
+    def complete(self, prompt, system=None, timeout=None):
+        """Queue a prompt and block until its answer arrives, at most `timeout` seconds"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        return self.submit(prompt, system, deadline).result(timeout=timeout)
+
+    def submit(self, prompt, system=None, deadline=None):
+        self._ensure_started()
+        request = _Request(prompt, system, deadline)
+        self.stats_counts["requests"] += 1
+        self._queue.put(request)
+        return request.future
+
+    def reserve(self, prompt, system=None, size=1):
+        """Wait for rate budget for a call made outside the scheduler (e.g. a streaming call)"""
+        self._acquire_budget(estimate_tokens((system or "") + prompt) + self.output_tokens * size)
+        self.stats_counts["calls"] += 1
+
+    def stats(self):
+        return dict(self.stats_counts)
+
+    def _expire(self, requests):
+        live = _drop_expired(requests)
+        self.stats_counts["expired"] += len(requests) - len(live)
+        return live
+
+    # ---------- dispatcher ----------
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._dispatch_loop, name="llm-scheduler", daemon=True)
+                self._thread.start()
+
+    def _dispatch_loop(self):
+        while True:
+            pending = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(pending) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    pending.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            groups = {}
+            for request in self._expire(pending):
+                groups.setdefault(request.system, []).append(request)
+            for system, requests in groups.items():
+                self._executor.submit(self._run_group, system, requests)
+
+    def _run_group(self, system, requests):
+        # may have sat behind busy threads since dispatch
+        requests = self._expire(requests)
+        if not requests:
+            return
+        # a batch is answered all at once, so it has to fit the most urgent caller's deadline
+        deadlines = [r.deadline for r in requests if r.deadline is not None]
+        deadline = min(deadlines) if deadlines else None
+        try:
+            if len(requests) == 1:
+                requests[0].future.set_result(self._call(requests[0].prompt, system, 1, deadline))
+                return
+            tasks = json.dumps([r.prompt for r in requests], ensure_ascii=False)
+            answers = _parse_answers(self._call(BATCH_PROMPT.format(n=len(requests), tasks=tasks),
+                                                system, len(requests), deadline), len(requests))
+            self.stats_counts["batched_calls"] += 1
+        except Exception as e:
+            for request in requests:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+        if answers is None:
+            # the model didn't follow the batch format; fall back to one call per request
+            self.stats_counts["split_failures"] += 1
+            for request in requests:
+                self._executor.submit(self._run_group, system, [request])
+            return
+        for request, answer in zip(requests, answers):
+            request.future.set_result(answer)
+
+    def _acquire_budget(self, tokens, deadline=None):
+        while True:
+            with self._budget_lock:
+                wait = max(self._requests.wait_time(1), self._tokens.wait_time(tokens))
+                if wait <= 0:
+                    self._requests.take(1)
+                    self._tokens.take(tokens)
+                    return
+            if deadline is not None and time.monotonic() + wait >= deadline:
+                raise TimeoutError("no rate budget before the request's deadline")
+            time.sleep(min(wait, 5.0))
+
+    def _call(self, prompt, system, size, deadline=None):
+        tokens = estimate_tokens((system or "") + prompt) + self.output_tokens * size
+        for attempt in range(self.max_retries + 1):
+            self._acquire_budget(tokens, deadline)
+            timeout = None
+            if deadline is not None:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    raise TimeoutError("request deadline passed before the provider call")
+            self.stats_counts["calls"] += 1
+            try:
+                return self.complete_fn(prompt, system, size, timeout)
+            except Exception as e:
+                if not is_rate_limit_error(e):
+                    raise
+                self.stats_counts["rate_limited"] += 1
+                if attempt == self.max_retries:
+                    raise RateLimitError(f"rate limited after {attempt + 1} attempts: {e}")
+                backoff = min(30.0, 2 ** attempt) + random.uniform(0, 0.5)
+                if deadline is not None and time.monotonic() + backoff >= deadline:
+                    raise RateLimitError(f"rate limited and out of time after {attempt + 1} attempts: {e}")
+                time.sleep(backoff)
+
+
+def _drop_expired(requests):
+    """Fail requests whose caller has stopped waiting; returns the rest"""
+    now = time.monotonic()
+    live = []
+    for request in requests:
+        if request.deadline is not None and now >= request.deadline:
+            if not request.future.done():
+                request.future.set_exception(TimeoutError("request expired before it was sent"))
+        else:
+            live.append(request)
+    return live
+
+
+def _parse_answers(text, n):
+    text = (text or "").strip()
+    # models like to wrap JSON in ```json fences
+    text = re.sub(r"^```(?:json)?\s*|\s*```$", "", text)
+    try:
+        answers = json.loads(text)
+    except ValueError:
+        return None
+    if not isinstance(answers, list) or len(answers) != n or not all(isinstance(a, str) for a in answers):
+        return None
+    return [a.strip() for a in answers]
+
+
+def scheduler_from_env(complete_fn):
+    """Build a BatchScheduler configured through LLM_* environment variables"""
+    return BatchScheduler(
+        complete_fn,
+        window=float(os.environ.get("LLM_BATCH_WINDOW_MS", "50")) / 1000.0,
+        max_batch=int(os.environ.get("LLM_BATCH_MAX", "8")),
+        rpm=int(os.environ.get("LLM_RPM", "60")),
+        tpm=int(os.environ.get("LLM_TPM", "100000")),
+        max_retries=int(os.environ.get("LLM_MAX_RETRIES", "3")),
+        max_concurrency=int(os.environ.get("LLM_MAX_CONCURRENCY", "4")),
+    )
@@ -0,0 +1,107 @@
+import json
+import queue
+import threading
+import time
+
+
+def sse(event, data):
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def iter_with_deadline(make_iter, deadline):
+    """
+    Yield items from make_iter() (run on a helper thread) but raise TimeoutError once
+    time.monotonic() passes `deadline`, even if the provider stalls mid-stream.
+    """
+    items = queue.Queue()
+
+    def produce():
+        try:
+            for item in make_iter():
+                items.put(("item", item))
+            items.put(("end", None))
+        except Exception as e:
+            items.put(("error", e))
+
+    threading.Thread(target=produce, name="llm-stream", daemon=True).start()
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("LLM stream exceeded its latency budget")
+        try:
+            kind, value = items.get(timeout=remaining)
+        except queue.Empty:
+            raise TimeoutError("LLM stream exceeded its latency budget")
+        if kind == "item":
+            yield value
+        elif kind == "error":
+            raise value
+        else:
+            return
+
+
+class TokenStream:
+    """Tokens of one in-progress generation; any number of readers can follow it from the start"""
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.text = None
+        self._cond = threading.Condition()
+
+    def publish(self, delta):
+        if not delta:
+            return
+        with self._cond:
+            self.chunks.append(delta)
+            self._cond.notify_all()
+
+    def finish(self, text=None):
+        with self._cond:
+            self.done = True
+            self.text = text
+            self._cond.notify_all()
+
+    def follow(self, timeout=None):
+        """Yield every chunk (including ones published before we joined) until finish() or timeout"""
+        deadline = time.monotonic() + timeout if timeout else None
+        index = 0
+        while True:
+            with self._cond:
+                while index >= len(self.chunks) and not self.done:
+                    remaining = deadline - time.monotonic() if deadline else None
+                    if remaining is not None and remaining <= 0:
+                        return
+                    self._cond.wait(remaining)
+                new = self.chunks[index:]
+                index = len(self.chunks)
+                done = self.done
+            yield from new
+            if done:
+                return
+
+
+class StreamHub:
+    """In-process registry of TokenStreams keyed by e.g. resume id"""
+
+    def __init__(self):
+        self._streams = {}
+        self._lock = threading.Lock()
+
+    def open(self, key):
+        stream = TokenStream()
+        with self._lock:
+            self._streams[key] = stream
+        return stream
+
+    def get(self, key):
+        with self._lock:
+            return self._streams.get(key)
+
+    def close(self, key, text=None):
+        """Finish the stream; readers already following it still get everything"""
+        with self._lock:
+            stream = self._streams.pop(key, None)
+        if stream is not None:
+            stream.finish(text)
@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import threading
+
+from bytes_lru import BytesLRU
+
+
+def cache_key(data, template_name, template_source, css, extra=None):
+    """Hash everything that can change the rendered PDF"""
+    h = hashlib.sha256()
+    h.update(json.dumps(data, sort_keys=True, default=str).encode("utf-8"))
+    for part in (template_name, template_source, css):
+        h.update(b"\0")
+        h.update((part or "").encode("utf-8"))
+    if extra:
+        h.update(b"\0")
+        h.update(json.dumps(extra, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()
+
+
+class PDFCache:
+    """
+    Two tier PDF cache: a small in-memory BytesLRU in front of a directory of
+    <key>.pdf files that is trimmed (oldest first) when it grows past max_disk_bytes.
+    """
+
+    def __init__(self, cache_dir=None, max_memory_items=32, max_memory_bytes=32 * 1024 * 1024,
+                 max_disk_bytes=512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = BytesLRU(max_memory_items, max_memory_bytes)
+        self._disk_bytes = None
+        self._lock = threading.Lock()
+        self.disk_hits = 0
+        self.misses = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".pdf")
+
+    @property
+    def hits(self):
+        return self._memory.hits
+
+    def get(self, key):
+        pdf_bytes = self._memory.get(key)
+        if pdf_bytes is not None:
+            return pdf_bytes
+
+        pdf_bytes = self._read_disk(key)
+        with self._lock:
+            if pdf_bytes is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        self._memory.put(key, pdf_bytes)
+        return pdf_bytes
+
+    def put(self, key, pdf_bytes):
+        self._memory.put(key, pdf_bytes)
+        self._write_disk(key, pdf_bytes)
+
+    def path(self, key):
+        """Path of the cached PDF on disk, or None; lets callers stream it instead of reading it"""
+        if not self.cache_dir:
+            return None
+        path = self._path(key)
+        try:
+            os.utime(path)  # bump mtime so eviction keeps recently used files
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.disk_hits += 1
+        return path
+
+    def put_file(self, key, src_path):
+        """
+        Move a finished PDF file (on the same filesystem) into the disk tier without reading it.
+        Returns the cache path, or None if there is no disk tier or the file is too big for it.
+        """
+        if not self.cache_dir:
+            return None
+        size = os.path.getsize(src_path)
+        if size > self.max_disk_bytes:
+            return None
+        path = self._path(key)
+        os.replace(src_path, path)
+        self._evict_disk(size)
+        return path
+
+    def clear(self):
+        self._memory.clear()
+        with self._lock:
+            self._disk_bytes = None
+        if self.cache_dir:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".pdf"):
+                    try:
+                        os.remove(os.path.join(self.cache_dir, name))
+                    except OSError:
+                        pass
+
+    def stats(self):
+        memory = self._memory.stats()
+        with self._lock:
+            return {
+                "hits": memory["hits"],
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "memory_items": memory["items"],
+                "memory_bytes": memory["bytes"],
+                "disk_bytes": self._disk_bytes,
+            }
+
+    # ---------- disk tier ----------
+    def _read_disk(self, key):
+        if not self.cache_dir:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                pdf_bytes = f.read()
+            os.utime(path)  # bump mtime so eviction keeps recently used files
+            return pdf_bytes
+        except OSError:
+            return None
+
+    def _write_disk(self, key, pdf_bytes):
+        if not self.cache_dir or len(pdf_bytes) > self.max_disk_bytes:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(pdf_bytes)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print("PDF cache write failed:", e)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        self._evict_disk(len(pdf_bytes))
+
+    def _evict_disk(self, added):
+        with self._lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes += added
+                if self._disk_bytes <= self.max_disk_bytes:
+                    return
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith(".pdf"):
+                    continue
+                try:
+                    st = os.stat(os.path.join(self.cache_dir, name))
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, name))
+            total = sum(size for _, size, _ in entries)
+            entries.sort()
+            for _, size, name in entries:
+                if total <= self.max_disk_bytes:
+                    break
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                    total -= size
+                except OSError:
+                    pass
+            self._disk_bytes = total
@@ -0,0 +1,182 @@
+import json
+import os
+import threading
+import time
+import uuid
+
+JOB_TABLE = "pdf_job"
+
+
+class QueueFull(Exception):
+    """Raised when max_queued jobs are already waiting"""
+
+
+class Job:
+    def __init__(self, job_id, meta=None, status="queued", result=None, error=None,
+                 created=None, started=None, finished=None):
+        self.id = job_id
+        self.meta = meta or {}
+        self.status = status
+        self.result = result
+        self.error = error
+        self.created = created
+        self.started = started
+        self.finished = finished
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(row[0], json.loads(row[1] or "{}"), *row[2:])
+
+    def to_dictionary(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "error": self.error,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            **self.meta,
+        }
+
+
+_COLUMNS = "id, meta, status, result, error, created, started, finished"
+
+
+class JobQueue:
+    """
+    Render jobs kept in a SQLite table, so any web worker process can answer a poll for a job
+    another one accepted. Every process that has submitted a job runs `max_workers` threads
+    that claim queued jobs with a conditional UPDATE (so each job runs once) and call
+    handler(meta), whose return value is stored as the job result. A job left "running" for
+    `claim_timeout` seconds by a process that died is claimed again. At most `max_queued` jobs
+    may wait at once; finished jobs are kept for `ttl` seconds so clients can fetch the result.
+    """
+
+    def __init__(self, handler, max_workers=4, max_queued=100, ttl=3600, claim_timeout=600,
+                 poll_interval=1.0):
+        self.handler = handler
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.ttl = ttl
+        self.claim_timeout = claim_timeout
+        self.poll_interval = poll_interval
+        self._engine = None
+        self._wake = threading.Event()
+        self._threads = []
+        self._start_lock = threading.Lock()
+        self._submits = 0
+        self.rejected = 0
+
+    def bind(self, engine):
+        """Use this engine and create the job table if needed"""
+        self._engine = engine
+        with engine.begin() as conn:
+            conn.exec_driver_sql(
+                f"CREATE TABLE IF NOT EXISTS {JOB_TABLE} (id TEXT PRIMARY KEY, meta TEXT,"
+                " status TEXT NOT NULL, result TEXT, error TEXT, created REAL NOT NULL,"
+                " started REAL, finished REAL)"
+            )
+            conn.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS ix_{JOB_TABLE}_status ON {JOB_TABLE} (status, created)")
+
+    def submit(self, meta=None):
+        job = Job(uuid.uuid4().hex, meta, created=time.time())
+        with self._engine.begin() as conn:
+            # the cap is checked in the INSERT itself, so concurrent submits can't overshoot it
+            inserted = conn.exec_driver_sql(
+                f"INSERT INTO {JOB_TABLE} (id, meta, status, created) SELECT ?, ?, 'queued', ?"
+                f" WHERE (SELECT COUNT(*) FROM {JOB_TABLE} WHERE status = 'queued') < ?",
+                (job.id, json.dumps(job.meta), job.created, self.max_queued),
+            ).rowcount
+        if not inserted:
+            self.rejected += 1
+            raise QueueFull("too many PDF jobs are waiting")
+        self._submits += 1
+        if self._submits % 100 == 0:
+            self._prune()
+        self._ensure_started()
+        self._wake.set()
+        return job
+
+    def get(self, job_id):
+        with self._engine.connect() as conn:
+            row = conn.exec_driver_sql(f"SELECT {_COLUMNS} FROM {JOB_TABLE} WHERE id = ?", (job_id,)).first()
+        return Job.from_row(row) if row is not None else None
+
+    def stats(self):
+        if self._engine is None:
+            return {}
+        with self._engine.connect() as conn:
+            counts = dict(conn.exec_driver_sql(f"SELECT status, COUNT(*) FROM {JOB_TABLE} GROUP BY status").all())
+        return {**counts, "rejected": self.rejected, "max_queued": self.max_queued}
+
+    # ---------- workers ----------
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._threads:
+                return
+            for i in range(self.max_workers):
+                thread = threading.Thread(target=self._work, name=f"pdf-job-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _claim(self):
+        now = time.time()
+        with self._engine.connect() as conn:
+            # read-only check first, so idle polling never takes the write lock
+            waiting = conn.exec_driver_sql(
+                f"SELECT 1 FROM {JOB_TABLE} WHERE status = 'queued'"
+                f" OR (status = 'running' AND started < ?) LIMIT 1", (now - self.claim_timeout,)
+            ).first()
+        if waiting is None:
+            return None
+        with self._engine.begin() as conn:
+            row = conn.exec_driver_sql(
+                f"UPDATE {JOB_TABLE} SET status = 'running', started = ? WHERE id = ("
+                f"SELECT id FROM {JOB_TABLE} WHERE status = 'queued' OR (status = 'running' AND started < ?)"
+                f" ORDER BY created LIMIT 1) RETURNING {_COLUMNS}",
+                (now, now - self.claim_timeout),
+            ).first()
+        return Job.from_row(row) if row is not None else None
+
+    def _work(self):
+        while True:
+            try:
+                job = self._claim()
+            except Exception as e:
+                print("PDF job claim failed:", e)
+                job = None
+            if job is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+            status, result, error = "done", None, None
+            try:
+                result = self.handler(job.meta)
+            except Exception as e:
+                print("PDF job failed:", e)
+                status, error = "failed", str(e) or e.__class__.__name__
+            try:
+                with self._engine.begin() as conn:
+                    conn.exec_driver_sql(
+                        f"UPDATE {JOB_TABLE} SET status = ?, result = ?, error = ?, finished = ? WHERE id = ?",
+                        (status, result, error, time.time(), job.id),
+                    )
+            except Exception as e:
+                print("PDF job result not saved:", e)
+
+    def _prune(self):
+        with self._engine.begin() as conn:
+            conn.exec_driver_sql(
+                f"DELETE FROM {JOB_TABLE} WHERE finished IS NOT NULL AND finished < ?", (time.time() - self.ttl,)
+            )
+
+
+def queue_from_env(handler):
+    """Build a JobQueue configured through PDF_JOB_* environment variables"""
+    return JobQueue(
+        handler,
+        max_workers=int(os.environ.get("PDF_JOB_WORKERS", "4")),
+        max_queued=int(os.environ.get("PDF_JOB_MAX_QUEUED", "100")),
+        ttl=float(os.environ.get("PDF_JOB_TTL", "3600")),
+        claim_timeout=float(os.environ.get("PDF_JOB_CLAIM_TIMEOUT", "600")),
+    )
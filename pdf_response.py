@@ -0,0 +1,42 @@
+import io
+import os
+import tempfile
+
+from flask import send_file
+
+
+def remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def temporary_pdf_path(directory=None):
+    """A fresh, closed file for a renderer to write into; names end in .tmp so cache scans skip them"""
+    fd, path = tempfile.mkstemp(suffix=".pdf.tmp", dir=directory or None)
+    os.close(fd)
+    return path
+
+
+class TemporaryPDF(io.FileIO):
+    """File that deletes itself once the server closes it after sending"""
+
+    def close(self):
+        super().close()
+        remove_quietly(self.name)
+
+
+def send_pdf_file(path, download_name, temporary=False):
+    """
+    Stream a PDF from disk in chunks with Content-Length, instead of reading it into memory.
+    A temporary file is deleted after it has been sent.
+    """
+    if not temporary:
+        return send_file(path, mimetype="application/pdf", as_attachment=True, download_name=download_name)
+    # werkzeug hands file responses straight to the server's file wrapper, which closes the
+    # file but skips response.call_on_close(), so cleanup has to hang off the file itself
+    response = send_file(TemporaryPDF(path), mimetype="application/pdf", as_attachment=True,
+                         download_name=download_name)
+    response.content_length = os.path.getsize(path)
+    return response
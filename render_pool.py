@@ -0,0 +1,101 @@
+import os
+import subprocess
+import threading
+
+
+class PoolBusy(Exception):
+    """Raised when the render queue is full"""
+
+
+class RenderTimeout(Exception):
+    """Raised when a render job takes longer than the pool timeout"""
+
+
+class RendererPool:
+    """
+    Caps how many wkhtmltopdf processes run at once. wkhtmltopdf has no resident mode, so
+    every render is one child process; renders run on the calling thread, at most `workers`
+    at a time, with up to `queue_size` more waiting. Anything beyond that waits `queue_wait`
+    seconds and is then rejected with PoolBusy, and each wkhtmltopdf run is killed after
+    `timeout` seconds.
+    """
+
+    def __init__(self, wkhtmltopdf=None, workers=2, queue_size=8, timeout=30, queue_wait=5):
+        self.wkhtmltopdf = wkhtmltopdf
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.queue_wait = queue_wait
+        self._admitted = threading.BoundedSemaphore(workers + queue_size)
+        self._running = threading.BoundedSemaphore(workers)
+        self._config = None
+        self._config_lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    def _configuration(self):
+        """pdfkit configuration, resolving the wkhtmltopdf binary once"""
+        with self._config_lock:
+            if self._config is None:
+                import pdfkit
+                if self.wkhtmltopdf:
+                    self._config = pdfkit.configuration(wkhtmltopdf=self.wkhtmltopdf)
+                else:
+                    self._config = pdfkit.configuration()
+            return self._config
+
+    def render(self, html, options=None, output_path=None):
+        """Render html to PDF bytes (or into output_path, which is returned), blocking until done"""
+        if not self._admitted.acquire(timeout=self.queue_wait):
+            self.rejected += 1
+            raise PoolBusy("PDF renderer queue is full")
+        try:
+            with self._running:
+                value = self._run(html, dict(options or {}), output_path)
+        except RenderTimeout:
+            self.timeouts += 1
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self._admitted.release()
+        self.completed += 1
+        return value
+
+    def _run(self, html, options, output_path):
+        import pdfkit
+        kit = pdfkit.PDFKit(html, "string", options=options, configuration=self._configuration())
+        args = kit.command(output_path)
+        try:
+            result = subprocess.run(args, input=kit.source.to_s().encode("utf-8"),
+                                    stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            raise RenderTimeout(f"wkhtmltopdf did not finish within {self.timeout}s")
+        stderr = (result.stderr or result.stdout or b"").decode("utf-8", errors="replace")
+        kit.handle_error(result.returncode, stderr)
+        if output_path:
+            return output_path
+        return result.stdout
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+        }
+
+
+def pool_from_env(wkhtmltopdf=None):
+    """Build a RendererPool configured through RENDER_* environment variables"""
+    return RendererPool(
+        wkhtmltopdf=wkhtmltopdf,
+        workers=int(os.environ.get("RENDER_WORKERS", "2")),
+        queue_size=int(os.environ.get("RENDER_QUEUE_SIZE", "8")),
+        timeout=float(os.environ.get("RENDER_TIMEOUT", "30")),
+    )
@@ -0,0 +1,168 @@
+"""
+Render resumes in bulk without the GUI.
+
+Reads records shaped like the dict ResumeBuilderGUI.generate_resume builds, from a
+JSONL file (one object per line) or a CSV file (one column per key; list fields such
+as education or projects hold one entry per line), and renders them across a process pool:
+
+    python resume_batch.py cohort.jsonl -o out/ -j 4
+
+Outputs that already exist are skipped, so an interrupted run can simply be restarted.
+Records that fail, including unparseable lines, are written to <output>/errors.jsonl with
+their line number. The file is rewritten on every run, since a restart retries everything
+that did not produce an output, so it always lists exactly the last run's failures.
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import resume_pdf
+
+TEXT_FIELDS = ("name", "email", "phone", "location", "linkedin", "github", "portfolio",
+               "summary", "languages", "frameworks", "tools", "databases")
+LIST_FIELDS = ("education", "experience", "projects", "certifications", "achievements")
+
+
+def read_records(path):
+    """
+    Yield (line number, raw record) one at a time from a .jsonl or .csv file. JSONL lines
+    are yielded unparsed so a bad line fails only its own record (see parse_record).
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if line:
+                    yield line_number, line
+
+
+def parse_record(raw):
+    record = json.loads(raw) if isinstance(raw, str) else raw
+    if not isinstance(record, dict):
+        raise TypeError(f"expected a JSON object, got {type(record).__name__}")
+    return record
+
+
+def normalize_record(record):
+    """Fill in every key create_pdf expects; list fields may be given as newline separated text"""
+    data = {}
+    for key in TEXT_FIELDS:
+        data[key] = str(record.get(key) or "").strip()
+    for key in LIST_FIELDS:
+        value = record.get(key) or []
+        if isinstance(value, str):
+            value = value.split("\n")
+        data[key] = [str(v).strip() for v in value if str(v).strip()]
+    data["photo"] = record.get("photo") or None
+    return data
+
+
+def output_name(index, record):
+    filename = str(record.get("filename") or "").strip()
+    if not filename:
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", str(record.get("name") or "resume")).strip("_") or "resume"
+        filename = f"{index:05d}_{slug}"
+    if not filename.endswith(".pdf"):
+        filename += ".pdf"
+    return os.path.basename(filename)
+
+
+def render_record(data, path):
+    """Render into a temp file first so a killed run never leaves a half-written PDF behind"""
+    tmp_path = path + ".part"
+    try:
+        resume_pdf.create_pdf(data, tmp_path)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+def run_batch(input_path, output_dir, jobs=None, force=False, progress=True):
+    os.makedirs(output_dir, exist_ok=True)
+    error_log_path = os.path.join(output_dir, "errors.jsonl")
+    jobs = jobs or os.cpu_count() or 1
+    counts = {"rendered": 0, "skipped": 0, "failed": 0}
+    started = time.time()
+
+    def report(final=False):
+        if not progress:
+            return
+        elapsed = time.time() - started
+        rate = counts["rendered"] / elapsed if elapsed else 0
+        sys.stderr.write(f"\rrendered {counts['rendered']}  skipped {counts['skipped']}  "
+                         f"failed {counts['failed']}  ({rate:.1f}/s)")
+        if final:
+            sys.stderr.write("\n")
+        sys.stderr.flush()
+
+    with open(error_log_path, "w", encoding="utf-8") as error_log, \
+            ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending = {}
+
+        def collect(futures):
+            for future in futures:
+                index, line_number, name = pending.pop(future)
+                try:
+                    future.result()
+                    counts["rendered"] += 1
+                except Exception as e:
+                    counts["failed"] += 1
+                    error_log.write(json.dumps({"record": index, "line": line_number, "output": name,
+                                                "error": str(e)}) + "\n")
+                    error_log.flush()
+            report()
+
+        for index, (line_number, raw) in enumerate(read_records(input_path), start=1):
+            name = None
+            try:
+                record = parse_record(raw)
+                name = output_name(index, record)
+                path = os.path.join(output_dir, name)
+                if not force and os.path.exists(path):
+                    counts["skipped"] += 1
+                    continue
+                data = normalize_record(record)
+            except Exception as e:
+                counts["failed"] += 1
+                error_log.write(json.dumps({"record": index, "line": line_number, "output": name,
+                                            "error": f"{type(e).__name__}: {e}"}) + "\n")
+                error_log.flush()
+                continue
+            # keep only a couple of records per worker in flight so huge inputs stream through
+            if len(pending) >= jobs * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending[executor.submit(render_record, data, path)] = (index, line_number, name)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            collect(done)
+    report(final=True)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render resumes in bulk from JSONL or CSV records.")
+    parser.add_argument("input", help="records file (.jsonl or .csv)")
+    parser.add_argument("-o", "--output", default="resumes_out", help="output directory")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="re-render outputs that already exist")
+    parser.add_argument("--quiet", action="store_true", help="no progress output")
+    args = parser.parse_args(argv)
+    counts = run_batch(args.input, args.output, jobs=args.jobs, force=args.force, progress=not args.quiet)
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,9 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext, filedialog
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image as RLImage
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
-from datetime import datetime
 import os
 
+import resume_pdf
+
 class ResumeBuilderGUI:
     def __init__(self, root):
         self.root = root
@@ -318,140 +313,7 @@ class ResumeBuilderGUI:
             messagebox.showerror("Error", f"Failed to generate PDF:\n{str(e)}")
     
     def create_pdf(self, data, filename):
-        doc = SimpleDocTemplate(filename, pagesize=A4,
-                                rightMargin=0.5*inch, leftMargin=0.5*inch,
-                                topMargin=0.5*inch, bottomMargin=0.5*inch)
-        
-        story = []
-        styles = getSampleStyleSheet()
-        
-        # Custom Styles
-        title_style = ParagraphStyle('CustomTitle', parent=styles['Heading1'],
-                                     fontSize=26, alignment=TA_CENTER,
-                                     textColor=colors.HexColor('#1a1a1a'),
-                                     spaceAfter=8, fontName='Helvetica-Bold')
-        
-        contact_style = ParagraphStyle('Contact', parent=styles['Normal'],
-                                       fontSize=9, alignment=TA_CENTER,
-                                       textColor=colors.HexColor('#555555'),
-                                       spaceAfter=4)
-        
-        heading_style = ParagraphStyle('CustomHeading', parent=styles['Heading2'],
-                                       fontSize=13, textColor=colors.HexColor('#2c3e50'),
-                                       spaceAfter=10, spaceBefore=12,
-                                       fontName='Helvetica-Bold',
-                                       borderWidth=1, borderColor=colors.HexColor('#3498db'),
-                                       borderPadding=4, backColor=colors.HexColor('#ecf0f1'))
-        
-        normal_style = ParagraphStyle('CustomNormal', parent=styles['Normal'],
-                                      fontSize=10, leading=14,
-                                      textColor=colors.HexColor('#2c3e50'))
-        
-        bold_style = ParagraphStyle('Bold', parent=normal_style,
-                                    fontName='Helvetica-Bold', fontSize=10)
-        
-        # Name
-        story.append(Paragraph(data['name'], title_style))
-        
-        # Contact Info
-        contact_parts = [data['email'], data['phone']]
-        if data['location']:
-            contact_parts.append(data['location'])
-        story.append(Paragraph(' | '.join(contact_parts), contact_style))
-        
-        # Links
-        links = []
-        if data['linkedin']:
-            links.append(f"LinkedIn: {data['linkedin']}")
-        if data['github']:
-            links.append(f"GitHub: {data['github']}")
-        if data['portfolio']:
-            links.append(f"Portfolio: {data['portfolio']}")
-        
-        if links:
-            story.append(Paragraph(' | '.join(links), contact_style))
-        
-        story.append(Spacer(1, 0.2*inch))
-        
-        # Professional Summary
-        if data['summary']:
-            story.append(Paragraph("PROFESSIONAL SUMMARY", heading_style))
-            story.append(Paragraph(data['summary'], normal_style))
-            story.append(Spacer(1, 0.15*inch))
-        
-        # Education
-        if data['education']:
-            story.append(Paragraph("EDUCATION", heading_style))
-            for edu in data['education']:
-                parts = edu.split('|')
-                if len(parts) >= 3:
-                    edu_text = f"<b>{parts[0].strip()}</b><br/>{parts[1].strip()} | {parts[2].strip()}"
-                    if len(parts) >= 4:
-                        edu_text += f" | {parts[3].strip()}"
-                else:
-                    edu_text = edu
-                story.append(Paragraph(edu_text, normal_style))
-                story.append(Spacer(1, 0.08*inch))
-        
-        # Work Experience
-        if data['experience']:
-            story.append(Paragraph("WORK EXPERIENCE", heading_style))
-            for exp in data['experience']:
-                parts = exp.split('|')
-                if len(parts) >= 3:
-                    story.append(Paragraph(f"<b>{parts[0].strip()}</b> - {parts[1].strip()}", normal_style))
-                    story.append(Paragraph(f"<i>{parts[2].strip()}</i>", normal_style))
-                    if len(parts) >= 4:
-                        story.append(Paragraph(f"• {parts[3].strip()}", normal_style))
-                else:
-                    story.append(Paragraph(f"• {exp}", normal_style))
-                story.append(Spacer(1, 0.08*inch))
-        
-        # Projects
-        if data['projects']:
-            story.append(Paragraph("PROJECTS", heading_style))
-            for proj in data['projects']:
-                parts = proj.split('|')
-                if len(parts) >= 2:
-                    proj_header = f"<b>{parts[0].strip()}</b> | <i>{parts[1].strip()}</i>"
-                    story.append(Paragraph(proj_header, normal_style))
-                    if len(parts) >= 3:
-                        story.append(Paragraph(f"• {parts[2].strip()}", normal_style))
-                    if len(parts) >= 4:
-                        story.append(Paragraph(f"Link: {parts[3].strip()}", 
-                                             ParagraphStyle('Link', parent=normal_style, fontSize=8)))
-                else:
-                    story.append(Paragraph(f"• {proj}", normal_style))
-                story.append(Spacer(1, 0.08*inch))
-        
-        # Technical Skills
-        if any([data['languages'], data['frameworks'], data['tools'], data['databases']]):
-            story.append(Paragraph("TECHNICAL SKILLS", heading_style))
-            if data['languages']:
-                story.append(Paragraph(f"<b>Programming Languages:</b> {data['languages']}", normal_style))
-            if data['frameworks']:
-                story.append(Paragraph(f"<b>Frameworks & Libraries:</b> {data['frameworks']}", normal_style))
-            if data['tools']:
-                story.append(Paragraph(f"<b>Tools & Technologies:</b> {data['tools']}", normal_style))
-            if data['databases']:
-                story.append(Paragraph(f"<b>Databases:</b> {data['databases']}", normal_style))
-            story.append(Spacer(1, 0.12*inch))
-        
-        # Certifications
-        if data['certifications']:
-            story.append(Paragraph("CERTIFICATIONS", heading_style))
-            for cert in data['certifications']:
-                story.append(Paragraph(f"• {cert}", normal_style))
-            story.append(Spacer(1, 0.12*inch))
-        
-        # Achievements
-        if data['achievements']:
-            story.append(Paragraph("ACHIEVEMENTS", heading_style))
-            for achievement in data['achievements']:
-                story.append(Paragraph(f"• {achievement}", normal_style))
-        
-        # Build PDF
-        doc.build(story)
+        resume_pdf.create_pdf(data, filename)
 
 if __name__ == "__main__":
     root = tk.Tk()
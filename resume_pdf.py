@@ -0,0 +1,249 @@
+from reportlab.lib.pagesizes import A4
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.enums import TA_CENTER
+from functools import lru_cache
+from io import BytesIO
+import copy
+from xml.sax.saxutils import escape
+
+# Bump whenever a change here alters the rendered output (layout, styles, THEMES); it is part
+# of the PDF cache key, so cached PDFs from older layouts stop being served.
+LAYOUT_VERSION = 1
+
+# Colours per theme; a CompiledLayout is built once per theme and reused for every resume
+THEMES = {
+    'classic': {
+        'title': '#1a1a1a',
+        'contact': '#555555',
+        'heading': '#2c3e50',
+        'heading_border': '#3498db',
+        'heading_background': '#ecf0f1',
+        'text': '#2c3e50',
+    },
+}
+
+SECTION_TITLES = {
+    'summary': "PROFESSIONAL SUMMARY",
+    'education': "EDUCATION",
+    'experience': "WORK EXPERIENCE",
+    'projects': "PROJECTS",
+    'skills': "TECHNICAL SKILLS",
+    'certifications': "CERTIFICATIONS",
+    'achievements': "ACHIEVEMENTS",
+}
+
+SKILL_LABELS = (
+    ('skills', "Skills"),
+    ('languages', "Programming Languages"),
+    ('frameworks', "Frameworks & Libraries"),
+    ('tools', "Tools & Technologies"),
+    ('databases', "Databases"),
+)
+
+
+def split_entry(entry):
+    """Split a 'A | B | C' entry into stripped parts"""
+    return [part.strip() for part in entry.split('|')]
+
+
+class CompiledLayout:
+    """Styles, section headers and spacers for one theme; rendering only binds data into it"""
+
+    def __init__(self, theme='classic'):
+        palette = THEMES[theme]
+        styles = getSampleStyleSheet()
+
+        self.title_style = ParagraphStyle('CustomTitle', parent=styles['Heading1'],
+                                          fontSize=26, alignment=TA_CENTER,
+                                          textColor=colors.HexColor(palette['title']),
+                                          spaceAfter=8, fontName='Helvetica-Bold')
+
+        self.contact_style = ParagraphStyle('Contact', parent=styles['Normal'],
+                                            fontSize=9, alignment=TA_CENTER,
+                                            textColor=colors.HexColor(palette['contact']),
+                                            spaceAfter=4)
+
+        self.heading_style = ParagraphStyle('CustomHeading', parent=styles['Heading2'],
+                                            fontSize=13, textColor=colors.HexColor(palette['heading']),
+                                            spaceAfter=10, spaceBefore=12,
+                                            fontName='Helvetica-Bold',
+                                            borderWidth=1, borderColor=colors.HexColor(palette['heading_border']),
+                                            borderPadding=4, backColor=colors.HexColor(palette['heading_background']))
+
+        self.normal_style = ParagraphStyle('CustomNormal', parent=styles['Normal'],
+                                           fontSize=10, leading=14,
+                                           textColor=colors.HexColor(palette['text']))
+
+        self.link_style = ParagraphStyle('Link', parent=self.normal_style, fontSize=8)
+
+        # Headers are parsed once here and copied per document (wrap() keeps per-instance state)
+        self._headers = {key: Paragraph(text, self.heading_style) for key, text in SECTION_TITLES.items()}
+
+        # Spacers carry no layout state, so the same instances are shared by every story
+        self.header_gap = Spacer(1, 0.2*inch)
+        self.summary_gap = Spacer(1, 0.15*inch)
+        self.entry_gap = Spacer(1, 0.08*inch)
+        self.section_gap = Spacer(1, 0.12*inch)
+
+    def header(self, section):
+        return copy.copy(self._headers[section])
+
+    def text(self, markup):
+        return Paragraph(markup, self.normal_style)
+
+    def build_story(self, data):
+        story = []
+        text = self.text
+
+        # Name
+        story.append(Paragraph(data['name'], self.title_style))
+        if data.get('title'):
+            story.append(Paragraph(data['title'], self.contact_style))
+
+        # Contact Info
+        contact_parts = [p for p in (data['email'], data['phone'], data['location']) if p]
+        if contact_parts:
+            story.append(Paragraph(' | '.join(contact_parts), self.contact_style))
+
+        # Links
+        links = []
+        if data['linkedin']:
+            links.append(f"LinkedIn: {data['linkedin']}")
+        if data['github']:
+            links.append(f"GitHub: {data['github']}")
+        if data['portfolio']:
+            links.append(f"Portfolio: {data['portfolio']}")
+        if links:
+            story.append(Paragraph(' | '.join(links), self.contact_style))
+
+        story.append(self.header_gap)
+
+        # Professional Summary
+        if data['summary']:
+            story.append(self.header('summary'))
+            story.append(text(data['summary']))
+            story.append(self.summary_gap)
+
+        # Education
+        if data['education']:
+            story.append(self.header('education'))
+            for edu in data['education']:
+                parts = split_entry(edu)
+                if len(parts) >= 3:
+                    edu_text = f"<b>{parts[0]}</b><br/>{parts[1]} | {parts[2]}"
+                    if len(parts) >= 4:
+                        edu_text += f" | {parts[3]}"
+                else:
+                    edu_text = edu
+                story.append(text(edu_text))
+                story.append(self.entry_gap)
+
+        # Work Experience
+        if data['experience']:
+            story.append(self.header('experience'))
+            for exp in data['experience']:
+                parts = split_entry(exp)
+                if len(parts) >= 3:
+                    story.append(text(f"<b>{parts[0]}</b> - {parts[1]}"))
+                    story.append(text(f"<i>{parts[2]}</i>"))
+                    if len(parts) >= 4:
+                        story.append(text(f"• {parts[3]}"))
+                else:
+                    story.append(text(f"• {exp}"))
+                story.append(self.entry_gap)
+
+        # Projects
+        if data['projects']:
+            story.append(self.header('projects'))
+            for proj in data['projects']:
+                parts = split_entry(proj)
+                if len(parts) >= 2:
+                    story.append(text(f"<b>{parts[0]}</b> | <i>{parts[1]}</i>"))
+                    if len(parts) >= 3:
+                        story.append(text(f"• {parts[2]}"))
+                    if len(parts) >= 4:
+                        story.append(Paragraph(f"Link: {parts[3]}", self.link_style))
+                else:
+                    story.append(text(f"• {proj}"))
+                story.append(self.entry_gap)
+
+        # Technical Skills
+        skills = [(label, data.get(key)) for key, label in SKILL_LABELS if data.get(key)]
+        if skills:
+            story.append(self.header('skills'))
+            for label, value in skills:
+                story.append(text(f"<b>{label}:</b> {value}"))
+            story.append(self.section_gap)
+
+        # Certifications
+        if data['certifications']:
+            story.append(self.header('certifications'))
+            for cert in data['certifications']:
+                story.append(text(f"• {cert}"))
+            story.append(self.section_gap)
+
+        # Achievements
+        if data['achievements']:
+            story.append(self.header('achievements'))
+            for achievement in data['achievements']:
+                story.append(text(f"• {achievement}"))
+
+        return story
+
+    def render(self, data, filename):
+        doc = SimpleDocTemplate(filename, pagesize=A4,
+                                rightMargin=0.5*inch, leftMargin=0.5*inch,
+                                topMargin=0.5*inch, bottomMargin=0.5*inch)
+        doc.build(self.build_story(data))
+
+
+@lru_cache(maxsize=None)
+def get_layout(theme='classic'):
+    return CompiledLayout(theme)
+
+
+def create_pdf(data, filename, theme='classic'):
+    get_layout(theme).render(data, filename)
+
+
+def render_pdf_bytes(data, theme='classic'):
+    """Build the PDF in memory and return its bytes"""
+    buffer = BytesIO()
+    create_pdf(data, buffer, theme)
+    return buffer.getvalue()
+
+
+def _lines(text):
+    return [escape(line.strip()) for line in (text or "").splitlines() if line.strip()]
+
+
+def from_web_data(data):
+    """
+    Map the web apps' resume dict (Resume.to_dictionary() in appALL.py, the form dict in app.py)
+    onto the data shape create_pdf expects. Text is escaped since Paragraph parses markup.
+    """
+    return {
+        'name': escape(data.get('full_name') or 'Resume'),
+        'title': escape(data.get('title') or ''),
+        'email': escape(data.get('email') or ''),
+        'phone': escape(data.get('phone') or ''),
+        'location': '',
+        'linkedin': '',
+        'github': '',
+        'portfolio': escape(data.get('profile_link') or ''),
+        'summary': escape(data.get('summary_enhanced') or data.get('summary') or ''),
+        'education': _lines(data.get('education')),
+        'experience': _lines(data.get('experience_enhanced') or data.get('experience')),
+        'projects': _lines(data.get('projects')),
+        'languages': '',
+        'frameworks': '',
+        'tools': '',
+        'databases': '',
+        'skills': escape(data.get('skills') or ''),
+        'certifications': [],
+        'achievements': [],
+        'photo': None,
+    }
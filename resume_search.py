@@ -0,0 +1,133 @@
+import re
+
+from markupsafe import escape
+from sqlalchemy import event
+
+# Columns in the index. resume_fts is an external-content table: it stores only the index,
+# and reads the text (for snippets, column values and deletes) from SOURCE_VIEW, which
+# decodes the compressed resume columns with the TEXT_FUNCTION SQL function.
+FTS_COLUMNS = ("full_name", "title", "summary", "experience", "education", "projects", "skills")
+# bm25() weights, same order as FTS_COLUMNS: a hit in the name, title or skills counts for more
+FTS_WEIGHTS = (4.0, 3.0, 1.5, 1.0, 0.5, 0.5, 2.0)
+
+FTS_TABLE = "resume_fts"
+SOURCE_VIEW = "resume_fts_source"
+TEXT_FUNCTION = "resume_text"
+# the enhanced summary is searchable too, appended when it differs from the original
+SOURCE_VIEW_SQL = (
+    f"CREATE VIEW IF NOT EXISTS {SOURCE_VIEW} AS SELECT id, full_name, title,"
+    f" CASE WHEN summary_enhanced IS NULL"
+    f" OR {TEXT_FUNCTION}(summary_enhanced) = COALESCE({TEXT_FUNCTION}(summary), '')"
+    f" THEN COALESCE({TEXT_FUNCTION}(summary), '')"
+    f" ELSE COALESCE({TEXT_FUNCTION}(summary), '') || char(10) || {TEXT_FUNCTION}(summary_enhanced) END AS summary,"
+    f" {TEXT_FUNCTION}(experience) AS experience, {TEXT_FUNCTION}(education) AS education,"
+    f" {TEXT_FUNCTION}(projects) AS projects, {TEXT_FUNCTION}(skills) AS skills FROM resume"
+)
+# private-use markers around matches; swapped for <mark> after HTML-escaping the snippet
+_MARK_OPEN, _MARK_CLOSE = "\x02", "\x03"
+_TERM_RE = re.compile(r"\w+\*?", re.UNICODE)
+
+
+def fts5_available(connection):
+    try:
+        connection.exec_driver_sql("CREATE VIRTUAL TABLE temp._fts5_probe USING fts5(x)")
+        connection.exec_driver_sql("DROP TABLE temp._fts5_probe")
+        return True
+    except Exception:
+        return False
+
+
+def install_text_function(engine, decode):
+    """Register TEXT_FUNCTION (decode(stored value) -> str) on every connection the engine opens"""
+
+    @event.listens_for(engine, "connect")
+    def _register(dbapi_connection, connection_record):
+        dbapi_connection.create_function(TEXT_FUNCTION, 1, decode, deterministic=True)
+
+
+def create_index(connection):
+    """
+    Create the source view and the FTS5 table if needed. Returns True if the index was just
+    created (or replaced an older, self-contained one) and needs rebuild(). Every statement is
+    IF [NOT] EXISTS, so workers starting at the same time can all run this.
+    """
+    connection.exec_driver_sql(SOURCE_VIEW_SQL)
+    sql = connection.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)
+    ).scalar()
+    if sql is not None and "content" in sql:
+        return False
+    if sql is not None:
+        # stored its own uncompressed copy of every column
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    connection.exec_driver_sql(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5({', '.join(FTS_COLUMNS)},"
+        f" content = '{SOURCE_VIEW}', content_rowid = 'id',"
+        " tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    )
+    return True
+
+
+# External content means the index has to be told what it is removing, which FTS5 reads from
+# SOURCE_VIEW: unindex a row *before* the resume row changes, and index it again after.
+def unindex_document(connection, resume_id):
+    connection.exec_driver_sql(f"DELETE FROM {FTS_TABLE} WHERE rowid = ?", (resume_id,))
+
+
+def index_document(connection, resume_id):
+    """Index the current content of one resume (it must not be in the index already)"""
+    connection.exec_driver_sql(
+        f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)})"
+        f" SELECT id, {', '.join(FTS_COLUMNS)} FROM {SOURCE_VIEW} WHERE id = ?",
+        (resume_id,),
+    )
+
+
+def rebuild(connection):
+    """Rebuild the whole index from the resume table; returns how many rows it covers"""
+    connection.exec_driver_sql(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')")
+    connection.exec_driver_sql(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+    return connection.exec_driver_sql(f"SELECT COUNT(*) FROM {SOURCE_VIEW}").scalar()
+
+
+def match_expression(query):
+    """
+    Turn free text into an FTS5 query: every word must match, words are quoted so
+    user input can't be a syntax error, and a trailing * keeps prefix matching.
+    """
+    terms = []
+    for term in _TERM_RE.findall(query or ""):
+        prefix = term.endswith("*")
+        word = term.rstrip("*")
+        if word:
+            terms.append(f'"{word}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+def _highlight(snippet):
+    return str(escape(snippet or "")).replace(_MARK_OPEN, "<mark>").replace(_MARK_CLOSE, "</mark>")
+
+
+def search(connection, query, limit=20, offset=0):
+    """
+    Ranked search. Returns (total, results) where results are dicts with id, full_name,
+    title, score (lower is better, as bm25 reports it) and an HTML-safe snippet.
+    """
+    expression = match_expression(query)
+    if not expression:
+        return 0, []
+    total = connection.exec_driver_sql(
+        f"SELECT COUNT(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ?", (expression,)
+    ).scalar()
+    weights = ", ".join(str(w) for w in FTS_WEIGHTS)
+    rows = connection.exec_driver_sql(
+        f"SELECT rowid, full_name, title, bm25({FTS_TABLE}, {weights}) AS score,"
+        f" snippet({FTS_TABLE}, -1, ?, ?, '…', 16)"
+        f" FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ? ORDER BY score LIMIT ? OFFSET ?",
+        (_MARK_OPEN, _MARK_CLOSE, expression, limit, offset),
+    ).fetchall()
+    results = [
+        {"id": row[0], "full_name": row[1], "title": row[2], "score": round(row[3], 4), "snippet": _highlight(row[4])}
+        for row in rows
+    ]
+    return total, results
@@ -0,0 +1,171 @@
+import re
+
+# Spellings people actually type, mapped to one canonical skill name
+SKILL_ALIASES = {
+    "js": "javascript",
+    "java script": "javascript",
+    "ecmascript": "javascript",
+    "ts": "typescript",
+    "py": "python",
+    "python3": "python",
+    "golang": "go",
+    "c plus plus": "c++",
+    "cpp": "c++",
+    "c sharp": "c#",
+    "csharp": "c#",
+    "node": "node.js",
+    "nodejs": "node.js",
+    "node js": "node.js",
+    "react.js": "react",
+    "reactjs": "react",
+    "react js": "react",
+    "vue.js": "vue",
+    "vuejs": "vue",
+    "angularjs": "angular",
+    "postgres": "postgresql",
+    "psql": "postgresql",
+    "mongo": "mongodb",
+    "k8s": "kubernetes",
+    "aws cloud": "aws",
+    "amazon web services": "aws",
+    "gcp": "google cloud",
+    "ml": "machine learning",
+    "dl": "deep learning",
+    "nlp": "natural language processing",
+    "iot": "internet of things",
+    "html5": "html",
+    "css3": "css",
+    "ms excel": "excel",
+    "microsoft excel": "excel",
+    "dotnet": ".net",
+    "dot net": ".net",
+    ".net framework": ".net",
+    ".net core": ".net",
+    "asp.net core": "asp.net",
+}
+
+SKILL_TABLE = "resume_skill"
+# commas, semicolons, pipes, bullets and line breaks separate skills
+_SPLIT_RE = re.compile(r"[,;|\n\r•·]+")
+# "Languages: Python" -> "Python"
+_LABEL_RE = re.compile(r"^[^:]{1,40}:\s*")
+# a leading "." is kept when a letter follows it: ".net" is a skill, "net" is not
+_EDGE_RE = re.compile(r"^(?:[\s\-*()\[\]]|\.(?![^\W\d_]))+|[\s\-*.()\[\]]+$")
+
+
+def normalize_skill(skill):
+    """Lowercase, collapse whitespace, trim punctuation and apply SKILL_ALIASES"""
+    s = " ".join((skill or "").lower().split())
+    s = _EDGE_RE.sub("", s)
+    return SKILL_ALIASES.get(s, s)
+
+
+def parse_skills(text):
+    """Distinct normalized skills from a free-form skills field, in first-seen order"""
+    skills = []
+    for line in (text or "").splitlines():
+        for part in _SPLIT_RE.split(_LABEL_RE.sub("", line.strip())):
+            skill = normalize_skill(part)
+            if skill and len(skill) <= 80 and skill not in skills:
+                skills.append(skill)
+    return skills
+
+
+def create_table(connection):
+    """
+    Create the posting table if needed; returns True if it did not exist yet (and so is empty).
+    IF NOT EXISTS, because workers starting at the same time all run this.
+    """
+    exists = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (SKILL_TABLE,)
+    ).first()
+    # clustered on (skill, resume_id): each skill's posting list is one contiguous, sorted range
+    connection.exec_driver_sql(
+        f"CREATE TABLE IF NOT EXISTS {SKILL_TABLE} (skill TEXT NOT NULL, resume_id INTEGER NOT NULL,"
+        " PRIMARY KEY (skill, resume_id)) WITHOUT ROWID"
+    )
+    connection.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS ix_{SKILL_TABLE}_resume ON {SKILL_TABLE} (resume_id)")
+    return exists is None
+
+
+def index_skills(connection, resume_id, skills_text):
+    remove_skills(connection, resume_id)
+    skills = parse_skills(skills_text)
+    if skills:
+        connection.exec_driver_sql(
+            f"INSERT INTO {SKILL_TABLE} (skill, resume_id) VALUES (?, ?)",
+            [(skill, resume_id) for skill in skills],
+        )
+
+
+def remove_skills(connection, resume_id):
+    connection.exec_driver_sql(f"DELETE FROM {SKILL_TABLE} WHERE resume_id = ?", (resume_id,))
+
+
+def rebuild(connection, rows):
+    """Replace every posting list from (resume_id, skills_text) pairs; returns rows indexed"""
+    connection.exec_driver_sql(f"DELETE FROM {SKILL_TABLE}")
+    count = 0
+    for resume_id, skills_text in rows:
+        skills = parse_skills(skills_text)
+        if skills:
+            connection.exec_driver_sql(
+                f"INSERT INTO {SKILL_TABLE} (skill, resume_id) VALUES (?, ?)",
+                [(skill, resume_id) for skill in skills],
+            )
+        count += 1
+    connection.exec_driver_sql(f"ANALYZE {SKILL_TABLE}")
+    return count
+
+
+def _posting_sizes(connection, skills):
+    rows = connection.exec_driver_sql(
+        f"SELECT skill, COUNT(*) FROM {SKILL_TABLE} WHERE skill IN ({', '.join('?' * len(skills))}) GROUP BY skill",
+        tuple(skills),
+    ).fetchall()
+    sizes = dict(rows)
+    return {skill: sizes.get(skill, 0) for skill in skills}
+
+
+def find(connection, all_of=(), any_of=(), limit=50, offset=0):
+    """
+    Resume ids having every skill in all_of and at least one in any_of, newest first.
+    Returns (total, ids). Each skill is a posting-list range scan; lists are intersected
+    smallest first, and a query naming a skill nobody has returns without touching the rest.
+    """
+    all_of = list(dict.fromkeys(normalize_skill(s) for s in all_of if normalize_skill(s)))
+    any_of = list(dict.fromkeys(normalize_skill(s) for s in any_of if normalize_skill(s)))
+    if not all_of and not any_of:
+        return 0, []
+
+    parts, params = [], []
+    if all_of:
+        sizes = _posting_sizes(connection, all_of)
+        if min(sizes.values()) == 0:
+            return 0, []
+        for skill in sorted(all_of, key=sizes.get):
+            parts.append(f"SELECT resume_id FROM {SKILL_TABLE} WHERE skill = ?")
+            params.append(skill)
+    if any_of:
+        parts.append(f"SELECT resume_id FROM {SKILL_TABLE} WHERE skill IN ({', '.join('?' * len(any_of))})")
+        params.extend(any_of)
+
+    matches = " INTERSECT ".join(parts) if all_of else parts[0].replace("SELECT", "SELECT DISTINCT", 1)
+    # one pass over the posting lists serves both the page and the total
+    rows = connection.exec_driver_sql(
+        f"WITH matches AS MATERIALIZED ({matches})"
+        " SELECT resume_id, (SELECT COUNT(*) FROM matches) FROM matches ORDER BY resume_id DESC LIMIT ? OFFSET ?",
+        (*params, limit, offset),
+    ).fetchall()
+    if rows:
+        return rows[0][1], [row[0] for row in rows]
+    # past the last page
+    return connection.exec_driver_sql(f"SELECT COUNT(*) FROM ({matches})", tuple(params)).scalar(), []
+
+
+def top_skills(connection, limit=50):
+    """(skill, resume count) pairs, most common first"""
+    return [tuple(row) for row in connection.exec_driver_sql(
+        f"SELECT skill, COUNT(*) AS n FROM {SKILL_TABLE} GROUP BY skill ORDER BY n DESC, skill LIMIT ?",
+        (limit,),
+    )]
@@ -0,0 +1,50 @@
+import os
+
+from sqlalchemy import event
+
+
+def pragmas_from_env():
+    """Connection pragmas for a busy SQLite file, configured through SQLITE_* environment variables"""
+    return {
+        # readers don't block the writer (and vice versa); the setting sticks to the database file
+        "journal_mode": os.environ.get("SQLITE_JOURNAL_MODE", "WAL"),
+        # with WAL, NORMAL only risks the last commits on power loss, never corruption
+        "synchronous": os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL"),
+        # wait for the write lock instead of failing straight away with "database is locked"
+        "busy_timeout": int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+        "mmap_size": int(os.environ.get("SQLITE_MMAP_MB", "64")) * 1024 * 1024,
+        # negative means KiB rather than pages
+        "cache_size": -int(os.environ.get("SQLITE_CACHE_KB", "16384")),
+        "temp_store": os.environ.get("SQLITE_TEMP_STORE", "MEMORY"),
+    }
+
+
+def engine_options_from_env(pragmas=None):
+    """SQLAlchemy create_engine() options for a SQLite file shared by many request threads"""
+    busy_ms = (pragmas or {}).get("busy_timeout", 5000)
+    return {
+        "pool_size": int(os.environ.get("SQLITE_POOL_SIZE", "10")),
+        "max_overflow": int(os.environ.get("SQLITE_POOL_OVERFLOW", "20")),
+        "pool_timeout": float(os.environ.get("SQLITE_POOL_TIMEOUT", "30")),
+        "connect_args": {"timeout": busy_ms / 1000.0, "check_same_thread": False},
+    }
+
+
+def install_pragmas(engine, pragmas):
+    """Run the pragmas on every new DBAPI connection the engine opens"""
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def read_pragmas(connection, names=("journal_mode", "synchronous", "busy_timeout", "mmap_size", "cache_size")):
+    """Current values as seen by one connection, for /metrics and sanity checks"""
+    return {name: connection.exec_driver_sql(f"PRAGMA {name}").scalar() for name in names}
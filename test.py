@@ -0,0 +1,247 @@
+import threading
+import time
+
+import pytest
+
+import text_compression as tc
+from llm_scheduler import BatchScheduler, _parse_answers
+from resilience import CircuitBreaker, CircuitOpen
+from singleflight import SingleFlight, SingleFlightTimeout
+from skill_index import normalize_skill, parse_skills
+
+
+# ---------- SingleFlight ----------
+def test_singleflight_shares_one_call():
+    flights = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "answer"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flights.do("k", slow)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flights.do("k", slow))) for _ in range(3)]
+    for t in followers:
+        t.start()
+    while flights.stats()["shared"] < 3:
+        time.sleep(0.01)
+    release.set()
+    for t in [leader, *followers]:
+        t.join(5)
+
+    assert results == ["answer"] * 4
+    assert len(calls) == 1
+    assert flights.stats() == {"calls": 1, "shared": 3, "in_flight": 0}
+
+
+def test_singleflight_shares_exceptions_and_forgets_key():
+    flights = SingleFlight()
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        flights.do("k", fail)
+    assert flights.do("k", lambda: 2) == 2
+    assert flights.stats()["calls"] == 2
+
+
+def test_singleflight_waiter_timeout():
+    flights = SingleFlight()
+    release = threading.Event()
+    leader = threading.Thread(target=lambda: flights.do("k", lambda: release.wait(5)))
+    leader.start()
+    while flights.stats()["in_flight"] == 0:
+        time.sleep(0.01)
+    with pytest.raises(SingleFlightTimeout):
+        flights.do("k", lambda: None, timeout=0.05)
+    release.set()
+    leader.join(5)
+
+
+# ---------- CircuitBreaker ----------
+def _fail():
+    raise RuntimeError("provider down")
+
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            breaker.call(_fail)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpen):
+        breaker.call(lambda: "not called")
+    assert breaker.stats()["times_opened"] == 1
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_breaker_success_resets_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    with pytest.raises(RuntimeError):
+        breaker.call(_fail)
+    assert breaker.call(lambda: "ok") == "ok"
+    with pytest.raises(RuntimeError):
+        breaker.call(_fail)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_half_open_allows_one_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    with pytest.raises(RuntimeError):
+        breaker.call(_fail)
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_failed_probe_reopens():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    with pytest.raises(RuntimeError):
+        breaker.call(_fail)
+    time.sleep(0.06)
+    with pytest.raises(RuntimeError):
+        breaker.call(_fail)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.stats()["times_opened"] == 2
+
+
+def test_breaker_release_frees_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    with pytest.raises(RuntimeError):
+        breaker.call(_fail)
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+
+# ---------- BatchScheduler ----------
+def test_parse_answers():
+    assert _parse_answers('["a", " b "]', 2) == ["a", "b"]
+    assert _parse_answers('```json\n["a", "b"]\n```', 2) == ["a", "b"]
+    assert _parse_answers('["a"]', 2) is None
+    assert _parse_answers('["a", 1]', 2) is None
+    assert _parse_answers("Sure! Here you go: a, b", 2) is None
+    assert _parse_answers(None, 1) is None
+
+
+def _scheduler(complete_fn, **kwargs):
+    return BatchScheduler(complete_fn, window=0.2, rpm=1000, tpm=10 ** 7, **kwargs)
+
+
+def _complete_all(scheduler, prompts, system="sys"):
+    futures = [scheduler.submit(p, system) for p in prompts]
+    return [f.result(timeout=5) for f in futures]
+
+
+def test_scheduler_batches_and_splits_answers():
+    calls = []
+
+    def complete(prompt, system, size, timeout):
+        calls.append(size)
+        return '["one", "two", "three"]'
+
+    scheduler = _scheduler(complete)
+    assert _complete_all(scheduler, ["p1", "p2", "p3"]) == ["one", "two", "three"]
+    assert calls == [3]
+    assert scheduler.stats()["batched_calls"] == 1
+
+
+def test_scheduler_falls_back_to_single_calls():
+    def complete(prompt, system, size, timeout):
+        if size > 1:
+            return "I can't answer in JSON"
+        return prompt.upper()
+
+    scheduler = _scheduler(complete)
+    assert _complete_all(scheduler, ["a", "b"]) == ["A", "B"]
+    assert scheduler.stats()["split_failures"] == 1
+
+
+def test_scheduler_groups_by_system_prompt():
+    systems = []
+
+    def complete(prompt, system, size, timeout):
+        systems.append((system, size))
+        return prompt
+
+    scheduler = _scheduler(complete)
+    futures = [scheduler.submit("a", "x"), scheduler.submit("b", "y")]
+    assert [f.result(timeout=5) for f in futures] == ["a", "b"]
+    assert sorted(systems) == [("x", 1), ("y", 1)]
+
+
+def test_scheduler_expired_request_is_not_sent():
+    calls = []
+    scheduler = _scheduler(lambda *a: calls.append(a) or "late")
+    future = scheduler.submit("p", None, deadline=time.monotonic() - 1)
+    with pytest.raises(TimeoutError):
+        future.result(timeout=5)
+    assert calls == []
+    assert scheduler.stats()["expired"] == 1
+
+
+# ---------- text_compression ----------
+SAMPLE = "Senior software engineer with eight years of experience building Python services. " * 4
+
+
+def test_compression_round_trip():
+    packed = tc.compress_text(SAMPLE, dict_id=0)
+    assert isinstance(packed, bytes) and packed.startswith(tc.MAGIC)
+    assert len(packed) < len(SAMPLE)
+    assert tc.decompress_text(packed) == SAMPLE
+
+
+def test_compression_round_trip_with_dictionary():
+    dictionary = tc.train_dictionary([SAMPLE, SAMPLE.upper(), "Python services " * 10])
+    tc.register_dictionary(900, dictionary)
+    text = "Senior software engineer with eight years of experience building Python services for payments."
+    packed = tc.compress_text(text, dict_id=900)
+    assert tc.decompress_text(packed) == text
+    assert len(packed) < len(tc.compress_text(text, dict_id=0))
+
+
+def test_compression_leaves_short_and_legacy_values():
+    assert tc.compress_text("short", dict_id=0) == "short"
+    assert tc.compress_text(None) is None
+    assert tc.decompress_text("plain text") == "plain text"
+    assert tc.decompress_text("plain bytes ü".encode("utf-8")) == "plain bytes ü"
+    assert tc.decompress_text(None) is None
+
+
+def test_compression_unknown_dictionary():
+    packed = tc._HEADER.pack(tc.MAGIC, 901) + b"\x00"
+    with pytest.raises(LookupError):
+        tc.decompress_text(packed)
+
+
+# ---------- skill_index ----------
+@pytest.mark.parametrize("raw, expected", [
+    ("  Python3 ", "python"),
+    ("JS", "javascript"),
+    ("Node JS", "node.js"),
+    ("- Kubernetes.", "kubernetes"),
+    (".NET Core", ".net"),
+    ("C++", "c++"),
+    ("(SQL)", "sql"),
+    ("", ""),
+    (None, ""),
+])
+def test_normalize_skill(raw, expected):
+    assert normalize_skill(raw) == expected
+
+
+def test_parse_skills():
+    text = "Languages: Python, JS; py\nTools: Docker | k8s\n• React.js"
+    assert parse_skills(text) == ["python", "javascript", "docker", "kubernetes", "react"]
@@ -0,0 +1,152 @@
+import struct
+import threading
+import zlib
+from collections import Counter
+
+from sqlalchemy.types import Text, TypeDecorator
+
+# Compressed values are stored as BLOBs: MAGIC, a 2-byte dictionary id (0 = none), then a raw
+# deflate stream. Anything else read back (TEXT from before compression, or short values we
+# didn't bother compressing) is returned as-is, so old and new rows can live side by side.
+MAGIC = b"\x1fZ"
+_HEADER = struct.Struct(">2sH")
+# below this many bytes the header and deflate overhead usually outweigh the saving
+MIN_COMPRESS_BYTES = 64
+LEVEL = 6
+# zlib only looks back 32 KiB, so a longer preset dictionary is wasted
+MAX_DICTIONARY_BYTES = 32 * 1024
+
+_dictionaries = {}
+# compressors/decompressors already primed with a dictionary; copy() is ~5x cheaper than
+# passing zdict to a fresh object, which re-hashes the whole dictionary every time
+_primed = {}
+_active_id = 0
+_loader = None
+_lock = threading.Lock()
+
+
+def register_dictionary(dict_id, data, active=False):
+    global _active_id
+    with _lock:
+        _dictionaries[dict_id] = bytes(data)
+        _primed.pop(dict_id, None)
+        if active:
+            _active_id = dict_id
+
+
+def active_dictionary_id():
+    return _active_id
+
+
+def set_dictionary_loader(loader):
+    """loader(dict_id) -> bytes or None, used for dictionaries another process trained"""
+    global _loader
+    _loader = loader
+
+
+def _dictionary(dict_id):
+    data = _dictionaries.get(dict_id)
+    if data is None and _loader is not None:
+        data = _loader(dict_id)
+        if data is not None:
+            register_dictionary(dict_id, data)
+    if data is None:
+        raise LookupError(f"unknown compression dictionary {dict_id}")
+    return data
+
+
+def _primed_codecs(dict_id):
+    primed = _primed.get(dict_id)
+    if primed is None:
+        zdict = _dictionary(dict_id)
+        primed = _primed[dict_id] = (zlib.compressobj(LEVEL, zlib.DEFLATED, -15, zdict=zdict),
+                                     zlib.decompressobj(-15, zdict=zdict))
+    return primed
+
+
+def _compressor(dict_id):
+    if not dict_id:
+        return zlib.compressobj(LEVEL, zlib.DEFLATED, -15)
+    return _primed_codecs(dict_id)[0].copy()
+
+
+def _decompressor(dict_id):
+    if not dict_id:
+        return zlib.decompressobj(-15)
+    return _primed_codecs(dict_id)[1].copy()
+
+
+def compress_text(value, dict_id=None):
+    """bytes for the database, or the original str if compressing wouldn't save anything"""
+    if value is None:
+        return None
+    raw = value.encode("utf-8")
+    if len(raw) < MIN_COMPRESS_BYTES:
+        return value
+    dict_id = _active_id if dict_id is None else dict_id
+    compressor = _compressor(dict_id)
+    packed = _HEADER.pack(MAGIC, dict_id) + compressor.compress(raw) + compressor.flush()
+    return packed if len(packed) < len(raw) else value
+
+
+def decompress_text(value):
+    if value is None or isinstance(value, str):
+        return value
+    value = bytes(value)
+    if not value.startswith(MAGIC):
+        return value.decode("utf-8")
+    _, dict_id = _HEADER.unpack_from(value)
+    decompressor = _decompressor(dict_id)
+    return (decompressor.decompress(value[_HEADER.size:]) + decompressor.flush()).decode("utf-8")
+
+
+class CompressedText(TypeDecorator):
+    """Text column stored deflate-compressed (with the active shared dictionary) when that's smaller"""
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return compress_text(value)
+
+    def process_result_value(self, value, dialect):
+        return decompress_text(value)
+
+
+def train_dictionary(samples, size=MAX_DICTIONARY_BYTES):
+    """
+    Build a zlib preset dictionary from sample texts: word n-grams that occur in many samples,
+    scored by document frequency x length. The best ones go last, since deflate reaches
+    the end of the dictionary with the shortest distances.
+    """
+    counts = Counter()
+    documents = 0
+    for sample in samples:
+        words = (sample or "").split()
+        if not words:
+            continue
+        documents += 1
+        grams = set()
+        for n in (1, 2, 3, 4):
+            for i in range(len(words) - n + 1):
+                grams.add(" ".join(words[i:i + n]))
+        counts.update(grams)
+    if documents < 2:
+        return b""
+    scored = sorted(
+        ((df * len(gram), gram) for gram, df in counts.items() if df >= 2 and len(gram) >= 4),
+        reverse=True,
+    )
+    chosen, total = [], 0
+    for _, gram in scored:
+        piece = (gram + " ").encode("utf-8")
+        if total + len(piece) > size:
+            if size - total < 16:
+                break
+            continue
+        # skip grams already covered by a longer, better-scoring one
+        if any(gram in longer for longer in chosen[-64:]):
+            continue
+        chosen.append(gram)
+        total += len(piece)
+    return " ".join(reversed(chosen)).encode("utf-8")[-size:]